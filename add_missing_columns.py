@@ -7,7 +7,7 @@ import os
 # Add database_config to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'database_config'))
 
-from db_utils import get_database_connection
+from database_config.db_utils import get_database_connection
 
 def add_missing_columns():
     """Add missing columns for proper database synchronization"""
@@ -22,57 +22,84 @@ def add_missing_columns():
         print("❌ Failed to connect to database")
         return
     
-    # SQL commands to add missing columns
+    # Columns to add, grouped per table so each table is altered once
+    # (completed_date on processing_jobs: completed_at exists, but the sync method uses completed_date)
+    missing_columns = {
+        'file_upload': [
+            "ADD COLUMN IF NOT EXISTS processed_records INTEGER DEFAULT 0",
+        ],
+        'processing_jobs': [
+            "ADD COLUMN IF NOT EXISTS completed_date TIMESTAMP DEFAULT NULL",
+        ],
+        'company_data': [
+            "ADD COLUMN IF NOT EXISTS processed_date TIMESTAMP DEFAULT NULL",
+        ],
+    }
+    
+    # One ALTER TABLE per table, all sent together in a single transaction
     alter_commands = [
-        # Add processed_records to file_upload table
-        """
-        ALTER TABLE file_upload 
-        ADD COLUMN IF NOT EXISTS processed_records INTEGER DEFAULT 0;
-        """,
-        
-        # Add completed_date to processing_jobs table (though completed_at exists, sync method uses completed_date)
-        """
-        ALTER TABLE processing_jobs 
-        ADD COLUMN IF NOT EXISTS completed_date TIMESTAMP DEFAULT NULL;
-        """,
-        
-        # Add processed_date to company_data table
-        """
-        ALTER TABLE company_data 
-        ADD COLUMN IF NOT EXISTS processed_date TIMESTAMP DEFAULT NULL;
-        """
+        f"ALTER TABLE {table_name} {', '.join(clauses)};"
+        for table_name, clauses in missing_columns.items()
     ]
     
     print("🔧 Adding missing columns for database synchronization...")
     
-    for i, command in enumerate(alter_commands, 1):
+    try:
+        success = db.execute_query("\n".join(alter_commands))
+        if success:
+            print(f"✅ Column additions for {len(alter_commands)} tables completed successfully")
+        else:
+            print("❌ Column additions failed (no changes applied)")
+    except Exception as e:
+        print(f"❌ Error adding columns: {e}")
+    
+    # Indexes for the per-user statistics filter, the file_upload joins and the pending queue.
+    # CONCURRENTLY avoids blocking writes but cannot run inside a transaction.
+    index_commands = [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_file_upload_uploaded_by ON file_upload(uploaded_by) INCLUDE (id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_processing_jobs_file_upload_id ON processing_jobs(file_upload_id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_company_data_file_upload_id ON company_data(file_upload_id)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_file_upload_status_date ON file_upload(processing_status, upload_date) WHERE processing_status = 'pending'",
+    ]
+    
+    print("\n🔧 Creating lookup indexes...")
+    
+    for i, command in enumerate(index_commands, 1):
         try:
-            success = db.execute_query(command.strip())
-            if success:
-                print(f"✅ Column addition {i}/3 completed successfully")
+            if db.execute_query(command, autocommit=True):
+                print(f"✅ Index {i}/{len(index_commands)} created successfully")
             else:
-                print(f"❌ Column addition {i}/3 failed")
+                print(f"❌ Index {i}/{len(index_commands)} failed")
         except Exception as e:
-            print(f"❌ Error adding column {i}: {e}")
+            print(f"❌ Error creating index {i}: {e}")
     
     print("\n🔍 Verifying new columns...")
     
-    # Verify the columns were added
-    verification_queries = [
-        ("file_upload", "SELECT column_name FROM information_schema.columns WHERE table_name = 'file_upload' AND column_name = 'processed_records'"),
-        ("processing_jobs", "SELECT column_name FROM information_schema.columns WHERE table_name = 'processing_jobs' AND column_name = 'completed_date'"),
-        ("company_data", "SELECT column_name FROM information_schema.columns WHERE table_name = 'company_data' AND column_name = 'processed_date'")
+    # Verify the columns were added (single catalog query for all tables)
+    expected_columns = [
+        ("file_upload", "processed_records"),
+        ("processing_jobs", "completed_date"),
+        ("company_data", "processed_date")
     ]
+    pairs = ", ".join(f"('{table_name}', '{column_name}')" for table_name, column_name in expected_columns)
+    verification_query = f"""
+        SELECT table_name, column_name FROM information_schema.columns
+        WHERE (table_name, column_name) IN ({pairs})
+    """
     
-    for table_name, query in verification_queries:
-        try:
-            result = db.query_to_dataframe(query)
-            if result is not None and not result.empty:
+    try:
+        result = db.query_to_dataframe(verification_query)
+        present = set()
+        if result is not None and not result.empty:
+            present = set(zip(result['table_name'], result['column_name']))
+        
+        for table_name, column_name in expected_columns:
+            if (table_name, column_name) in present:
                 print(f"✅ {table_name}: Column added successfully")
             else:
                 print(f"❌ {table_name}: Column not found")
-        except Exception as e:
-            print(f"❌ Error verifying {table_name}: {e}")
+    except Exception as e:
+        print(f"❌ Error verifying columns: {e}")
     
     print("\n🎉 Database schema update completed!")
 
@@ -5,7 +5,9 @@ Production-ready launcher for the complete application
 
 import sys
 import os
+import datetime
 import logging
+import threading
 import traceback
 from pathlib import Path
 
@@ -27,56 +29,73 @@ def setup_logging():
         ]
     )
 
+def check_database(logger, debug_lines):
+    """Test the database connection and record the outcome in debug_lines"""
+    try:
+        from database_config.postgresql_config import PostgreSQLConfig
+        config = PostgreSQLConfig()
+        if config.test_connection():
+            logger.info("Database connection verified")
+            debug_lines.append("Database connection: SUCCESS")
+        else:
+            logger.error("Database connection failed")
+            debug_lines.append("Database connection: FAILED")
+    except Exception as db_error:
+        logger.error(f"Database connection error: {db_error}")
+        debug_lines.append(f"Database error: {db_error}")
+
+def show_error_dialog(title, message):
+    """Show a user-friendly error dialog (tkinter is only imported on this error path)"""
+    try:
+        import tkinter as tk
+        from tkinter import messagebox
+        root = tk.Tk()
+        root.withdraw()
+        messagebox.showerror(title, message)
+    except:
+        pass
+
 def main():
     """Main application entry point"""
     try:
         setup_logging()
         logger = logging.getLogger(__name__)
         
-        # Create debug file for executable testing
+        # Collect debug info for executable testing; written to disk once below
         debug_file = current_dir / "debug_launch.txt"
-        with open(debug_file, 'w') as f:
-            f.write(f"Company Data Scraper Launch Debug\n")
-            f.write(f"Time: {__import__('datetime').datetime.now()}\n")
-            f.write(f"Directory: {current_dir}\n")
-            f.write(f"Executable: {__import__('sys').executable}\n")
-            f.write(f"Frozen: {getattr(__import__('sys'), 'frozen', False)}\n")
-            f.write(f"MEIPASS: {hasattr(__import__('sys'), '_MEIPASS')}\n")
+        debug_lines = [
+            "Company Data Scraper Launch Debug",
+            f"Time: {datetime.datetime.now()}",
+            f"Directory: {current_dir}",
+            f"Executable: {sys.executable}",
+            f"Frozen: {getattr(sys, 'frozen', False)}",
+            f"MEIPASS: {hasattr(sys, '_MEIPASS')}",
+        ]
         
         logger.info("Starting Company Data Scraper Application")
         logger.info(f"Application directory: {current_dir}")
         
-        # Check for .env file
-        env_file = current_dir / ".env"
-        if not env_file.exists():
-            # Try database_config/.env as fallback
-            env_file = current_dir / "database_config" / ".env"
-            
-        logger.info(f"Looking for .env file at: {env_file}")
-        if env_file.exists():
+        # Check for .env file (database_config/.env as fallback)
+        env_candidates = (current_dir / ".env", current_dir / "database_config" / ".env")
+        env_file = next((path for path in env_candidates if path.exists()), None)
+        
+        logger.info(f"Looking for .env file at: {env_file or env_candidates[-1]}")
+        if env_file:
             logger.info(".env file found")
         else:
             logger.warning(".env file not found - database connection may fail")
         
-        # Test database connection before launching GUI
-        try:
-            from database_config.postgresql_config import PostgreSQLConfig
-            config = PostgreSQLConfig()
-            if config.test_connection():
-                logger.info("Database connection verified")
-                with open(debug_file, 'a') as f:
-                    f.write("Database connection: SUCCESS\n")
-            else:
-                logger.error("Database connection failed")
-                with open(debug_file, 'a') as f:
-                    f.write("Database connection: FAILED\n")
-        except Exception as db_error:
-            logger.error(f"Database connection error: {db_error}")
-            with open(debug_file, 'a') as f:
-                f.write(f"Database error: {db_error}\n")
+        # Test database connection in the background so the handshake
+        # overlaps with importing the GUI modules
+        db_check = threading.Thread(target=check_database, args=(logger, debug_lines), daemon=True)
+        db_check.start()
         
         # Import and start the login GUI
-        from gui.login_gui import main as start_login
+        try:
+            from gui.login_gui import main as start_login
+        finally:
+            db_check.join()
+            debug_file.write_text("\n".join(debug_lines) + "\n")
         
         logger.info("🔐 Launching authentication system...")
         start_login()
@@ -87,14 +106,7 @@ def main():
         logging.error(error_msg)
         
         # Show user-friendly error dialog
-        try:
-            import tkinter as tk
-            from tkinter import messagebox
-            root = tk.Tk()
-            root.withdraw()
-            messagebox.showerror("Import Error", error_msg)
-        except:
-            pass
+        show_error_dialog("Import Error", error_msg)
         
         sys.exit(1)
         
@@ -104,14 +116,7 @@ def main():
         logging.error(error_msg)
         
         # Show user-friendly error dialog
-        try:
-            import tkinter as tk
-            from tkinter import messagebox
-            root = tk.Tk()
-            root.withdraw()
-            messagebox.showerror("Application Error", f"An unexpected error occurred:\n\n{str(e)}")
-        except:
-            pass
+        show_error_dialog("Application Error", f"An unexpected error occurred:\n\n{str(e)}")
         
         sys.exit(1)
 
@@ -6,33 +6,99 @@ Connects the authenticated GUI with the existing file processing system
 import sys
 import os
 import json
+import time
 from datetime import datetime
 import threading
+from collections import OrderedDict
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import existing components
 try:
-    from database_config.db_utils import get_database_connection
+    from sqlalchemy import text
+    from database_config.db_utils import get_database_connection, get_shared_engine
     from enhanced_scheduled_processor import EnhancedScheduledProcessor
     DATABASE_AVAILABLE = True
 except ImportError as e:
     print(f"Warning: Database components not available: {e}")
     DATABASE_AVAILABLE = False
 
+# SQL statements built once at import so each upload reuses the same compiled statement
+if DATABASE_AVAILABLE:
+    INSERT_FILE_AND_JOB_SQL = text("""
+        WITH f AS (
+            INSERT INTO file_upload (file_name, raw_data, uploaded_by, processing_status, upload_date)
+            VALUES (:file_name, :raw_data, :uploaded_by, 'pending', CURRENT_TIMESTAMP)
+            RETURNING id
+        )
+        INSERT INTO processing_jobs (job_type, file_upload_id, job_status, scheduled_at)
+        SELECT 'data_extraction', f.id, 'queued', CURRENT_TIMESTAMP FROM f
+        RETURNING file_upload_id, id
+    """)
+    
+    PROCESSING_STATUS_SQL = text("""
+        SELECT 
+            pj.id as job_id,
+            pj.job_status,
+            pj.scheduled_at,
+            pj.started_at,
+            pj.completed_at,
+            fu.file_name,
+            fu.uploaded_by,
+            (
+                SELECT COUNT(*) FROM company_data cd
+                WHERE cd.file_upload_id = fu.id
+            ) as companies_processed
+        FROM processing_jobs pj
+        JOIN file_upload fu ON pj.file_upload_id = fu.id
+        ORDER BY pj.scheduled_at DESC
+        LIMIT :limit
+    """)
+    
+    USER_STATISTICS_SQL = text("""
+        SELECT 
+            COUNT(DISTINCT fu.id) as files_uploaded,
+            COUNT(DISTINCT pj.id) as jobs_created,
+            COUNT(DISTINCT cd.id) as companies_processed,
+            COUNT(CASE WHEN pj.job_status = 'completed' THEN 1 END) as jobs_completed
+        FROM file_upload fu
+        LEFT JOIN processing_jobs pj ON pj.file_upload_id = fu.id
+        LEFT JOIN company_data cd ON cd.file_upload_id = fu.id
+        WHERE fu.uploaded_by = :username
+    """)
+
+# At most this many uploads auto-process at once; the rest wait for a free slot.
+# Jobs run on daemon threads (not a ThreadPoolExecutor, whose workers are joined at
+# interpreter exit) so closing the app never waits on queued or running scrapes.
+AUTO_PROCESSING_WORKERS = 4
+_PROCESSING_SLOTS = threading.BoundedSemaphore(AUTO_PROCESSING_WORKERS)
+
+def _run_in_processing_slot(func, *args):
+    """Run func once one of the AUTO_PROCESSING_WORKERS slots is free"""
+    with _PROCESSING_SLOTS:
+        func(*args)
+
+# Per-user statistics cache: username -> (cached_at, stats), least recently stored first
+STATS_CACHE_TTL_SECONDS = 10
+STATS_CACHE_MAX_ENTRIES = 1000
+_STATS_CACHE = OrderedDict()
+_STATS_CACHE_LOCK = threading.Lock()
+
 class AuthenticatedFileProcessor:
     """Bridge between authenticated GUI and existing file processing system"""
     
     def __init__(self, user_info=None):
         self.user_info = user_info
         self.db_connection = None
+        self.engine = None
         self.processor = None
         
         if DATABASE_AVAILABLE:
             try:
                 self.db_connection = get_database_connection("postgresql")
-                self.db_connection.connect()
+                # Connections are checked out from the process-wide db_utils pool on demand
+                self.engine = get_shared_engine(self.db_connection.config)
                 self.processor = EnhancedScheduledProcessor()
                 print(f"✅ Database connection established for user: {user_info['username']}")
             except Exception as e:
@@ -66,29 +132,23 @@ class AuthenticatedFileProcessor:
             if progress_callback:
                 progress_callback("Reading Excel file...", 0, 4)
             
-            # Convert Excel to JSON (similar to existing logic)
+            # Read Excel into a DataFrame; it is serialized to JSON on insert
             excel_data = self._convert_excel_to_json(file_path)
             
-            if not excel_data:
+            if excel_data is None:
                 result["message"] = "Failed to read Excel file"
                 return result
             
             if progress_callback:
                 progress_callback("Inserting into database...", 1, 4)
             
-            # Insert into database with user context
-            file_id = self._insert_file_data(excel_data, file_path)
+            # Insert into database with user context and queue its processing job
+            file_id, job_id = self._insert_file_data(excel_data, file_path)
             
             if not file_id:
                 result["message"] = "Failed to insert file data"
                 return result
             
-            if progress_callback:
-                progress_callback("Creating processing job...", 2, 4)
-            
-            # Create processing job
-            job_id = self._create_processing_job(file_id)
-            
             if not job_id:
                 result["message"] = "Failed to create processing job"
                 return result
@@ -105,10 +165,11 @@ class AuthenticatedFileProcessor:
                 if progress_callback:
                     progress_callback("Starting auto-processing...", 3, 4)
                 
-                # Start processing in background thread
+                # Process in a background thread, bounded by the shared processing slots
                 threading.Thread(
-                    target=self._start_auto_processing,
-                    args=(job_id, progress_callback),
+                    target=_run_in_processing_slot,
+                    args=(self._start_auto_processing, job_id, progress_callback),
+                    name='autoproc',
                     daemon=True
                 ).start()
             
@@ -122,85 +183,60 @@ class AuthenticatedFileProcessor:
         return result
     
     def _convert_excel_to_json(self, file_path):
-        """Convert Excel file to JSON format"""
+        """Read Excel file into a DataFrame (serialized to JSON by _insert_file_data)"""
         try:
             import pandas as pd
+            from database_config.excel_engine import EXCEL_ENGINE
             
             # Read Excel file
-            df = pd.read_excel(file_path)
-            
-            # Convert to JSON format expected by the system
-            json_data = {
-                "columns": df.columns.tolist(),
-                "data": df.to_dict('records')
-            }
-            
-            return json_data
+            return pd.read_excel(file_path, engine=EXCEL_ENGINE)
             
         except Exception as e:
             print(f"❌ Excel conversion error: {e}")
             return None
     
     def _insert_file_data(self, excel_data, file_path):
-        """Insert file data into database"""
+        """
+        Insert file data into database and create its processing job
+        
+        Returns:
+            tuple: (file_id, job_id), or (None, None) on failure
+        """
         try:
-            if not self.db_connection:
-                return None
-            
-            from sqlalchemy import text
+            if not self.engine:
+                return None, None
             
             # Prepare file data
             file_name = os.path.basename(file_path)
-            raw_data = json.dumps(excel_data)
+            # Same {"columns": [...], "data": [...]} layout as before, but the rows
+            # are serialized by pandas' C encoder without an intermediate list of dicts
+            raw_data = (
+                '{"columns":' + json.dumps(excel_data.columns.tolist(), default=str) +
+                ',"data":' + excel_data.to_json(orient='records', date_format='iso') + '}'
+            )
             uploaded_by = self.user_info.get('username', 'system') if self.user_info else 'system'
             
-            # Insert into file_upload table
-            with self.db_connection.manager.engine.connect() as conn:
-                insert_query = text("""
-                    INSERT INTO file_upload (file_name, raw_data, uploaded_by, processing_status, upload_date)
-                    VALUES (:file_name, :raw_data, :uploaded_by, 'pending', CURRENT_TIMESTAMP)
-                    RETURNING id
-                """)
-                
-                result = conn.execute(insert_query, {
+            # Insert into file_upload and processing_jobs in a single statement
+            with self.engine.begin() as conn:
+                result = conn.execute(INSERT_FILE_AND_JOB_SQL, {
                     'file_name': file_name,
                     'raw_data': raw_data,
                     'uploaded_by': uploaded_by
                 })
                 
-                conn.commit()
-                file_id = result.fetchone()[0]
-                print(f"✅ File inserted with ID: {file_id}")
-                return file_id
-                
-        except Exception as e:
-            print(f"❌ Database insert error: {e}")
-            return None
-    
-    def _create_processing_job(self, file_id):
-        """Create processing job for the uploaded file"""
-        try:
-            if not self.db_connection:
-                return None
+                file_id, job_id = result.fetchone()
             
-            from sqlalchemy import text
+            # New uploads must show up in the user's statistics immediately
+            with _STATS_CACHE_LOCK:
+                _STATS_CACHE.pop(uploaded_by, None)
             
-            with self.db_connection.manager.engine.connect() as conn:
-                job_query = text("""
-                    INSERT INTO processing_jobs (job_type, file_upload_id, job_status, scheduled_at)
-                    VALUES ('data_extraction', :file_id, 'queued', CURRENT_TIMESTAMP)
-                    RETURNING id
-                """)
-                
-                result = conn.execute(job_query, {'file_id': file_id})
-                conn.commit()
-                job_id = result.fetchone()[0]
-                print(f"✅ Processing job created with ID: {job_id}")
-                return job_id
+            print(f"✅ File inserted with ID: {file_id}")
+            print(f"✅ Processing job created with ID: {job_id}")
+            return file_id, job_id
                 
         except Exception as e:
-            print(f"❌ Job creation error: {e}")
-            return None
+            print(f"❌ Database insert error: {e}")
+            return None, None
     
     def _start_auto_processing(self, job_id, progress_callback=None):
         """Start auto-processing in background"""
@@ -231,35 +267,14 @@ class AuthenticatedFileProcessor:
     def get_processing_status(self, limit=10):
         """Get recent processing status"""
         try:
-            if not self.db_connection:
+            if not self.engine:
                 return []
             
-            status_query = """
-                SELECT 
-                    pj.id as job_id,
-                    pj.job_status,
-                    pj.scheduled_at,
-                    pj.started_at,
-                    pj.completed_at,
-                    fu.file_name,
-                    fu.uploaded_by,
-                    COUNT(cd.id) as companies_processed
-                FROM processing_jobs pj
-                JOIN file_upload fu ON pj.file_upload_id = fu.id
-                LEFT JOIN company_data cd ON cd.file_upload_id = fu.id
-                GROUP BY pj.id, pj.job_status, pj.scheduled_at, pj.started_at, pj.completed_at, fu.file_name, fu.uploaded_by
-                ORDER BY pj.scheduled_at DESC
-                LIMIT %s
-            """
-            
-            # Replace with proper parameterized query
-            formatted_query = status_query.replace('%s', str(limit))
-            result = self.db_connection.query_to_dataframe(formatted_query)
-            
-            if result is not None and not result.empty:
-                return result.to_dict('records')
-            
-            return []
+            # Build plain dicts straight from the rows; no DataFrame needed
+            with self.engine.connect() as conn:
+                result = conn.execute(PROCESSING_STATUS_SQL, {'limit': int(limit)})
+                columns = list(result.keys())
+                return [dict(zip(columns, row)) for row in result]
             
         except Exception as e:
             print(f"❌ Status query error: {e}")
@@ -268,43 +283,50 @@ class AuthenticatedFileProcessor:
     def get_user_statistics(self):
         """Get statistics for the current user"""
         try:
-            if not self.db_connection or not self.user_info:
+            if not self.engine or not self.user_info:
                 return {}
             
             username = self.user_info['username']
             
-            # Get user-specific statistics
-            stats_query = f"""
-                SELECT 
-                    COUNT(DISTINCT fu.id) as files_uploaded,
-                    COUNT(DISTINCT pj.id) as jobs_created,
-                    COUNT(DISTINCT cd.id) as companies_processed,
-                    COUNT(CASE WHEN pj.job_status = 'completed' THEN 1 END) as jobs_completed
-                FROM file_upload fu
-                LEFT JOIN processing_jobs pj ON pj.file_upload_id = fu.id
-                LEFT JOIN company_data cd ON cd.file_upload_id = fu.id
-                WHERE fu.uploaded_by = '{username}'
-            """
-            
-            result = self.db_connection.query_to_dataframe(stats_query)
-            
-            if result is not None and not result.empty:
-                return result.iloc[0].to_dict()
+            # Serve repeated GUI refreshes from the cache while it is fresh
+            with _STATS_CACHE_LOCK:
+                cached = _STATS_CACHE.get(username)
+            if cached and time.monotonic() - cached[0] < STATS_CACHE_TTL_SECONDS:
+                return cached[1]
             
-            return {}
+            # Get user-specific statistics
+            with self.engine.connect() as conn:
+                result = conn.execute(USER_STATISTICS_SQL, {'username': username})
+                columns = list(result.keys())
+                row = result.fetchone()
+            
+            stats = {}
+            if row is not None:
+                stats = dict(zip(columns, row))
+                with _STATS_CACHE_LOCK:
+                    _STATS_CACHE.pop(username, None)
+                    _STATS_CACHE[username] = (time.monotonic(), stats)
+                    while len(_STATS_CACHE) > STATS_CACHE_MAX_ENTRIES:
+                        _STATS_CACHE.popitem(last=False)
+            
+            return stats
             
         except Exception as e:
             print(f"❌ Statistics error: {e}")
             return {}
 
-# Global processor instance
-authenticated_processor = None
+# Processor instances keyed by username
+_processors = {}
+_processors_lock = threading.Lock()
 
 def get_authenticated_processor(user_info):
-    """Get or create authenticated processor instance"""
-    global authenticated_processor
+    """Get or create the authenticated processor instance for this user"""
+    key = user_info['username']
     
-    if not authenticated_processor:
-        authenticated_processor = AuthenticatedFileProcessor(user_info)
+    with _processors_lock:
+        processor = _processors.get(key)
+        if processor is None:
+            processor = AuthenticatedFileProcessor(user_info)
+            _processors[key] = processor
     
-    return authenticated_processor
\ No newline at end of file
+    return processor
@@ -3,24 +3,68 @@ User Authentication System
 Handles user login, authentication, and session management with PostgreSQL
 """
 
-import hashlib
+import atexit
+import base64
 import bcrypt
+import hmac
+import json
 import os
 import sys
 from typing import Optional, Dict, Any
 import secrets
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 
-# Add project paths for database access
+# Add project root for database access; db_utils is always imported through the
+# database_config package so the process shares a single engine cache
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
-database_config_path = os.path.join(parent_dir, 'database_config')
-if database_config_path not in sys.path:
-    sys.path.insert(0, database_config_path)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
 
-from db_utils import get_database_connection
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from database_config.db_utils import get_database_connection, get_shared_engine
+
+# Optional Redis session cache shared across processes (enabled via REDIS_URL)
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# Upper bound on in-memory sessions per process; the least recently used are evicted first
+MAX_ACTIVE_SESSIONS = 100000
+
+# A session served from this process's memory is re-checked against the shared store
+# (so a logout handled by another worker takes effect) at most this often
+SESSION_RECHECK_SECONDS = 5
+
+# Cap per write buffer; once full the oldest entry is dropped (e.g. while the database is down)
+MAX_BUFFERED_WRITES = 10000
+
+# get_login_attempts switches to a server-side cursor above this many rows
+LOGIN_ATTEMPTS_STREAM_THRESHOLD = 1000
+
+# Bytes of CSPRNG output fetched per os.urandom call for session tokens
+RANDOM_BUFFER_SIZE = 4096
+
+# True when every auth table and index is already present (names resolve via search_path like the DDL)
+SCHEMA_EXISTS_SQL = """
+    SELECT to_regclass('users') IS NOT NULL
+       AND to_regclass('login_attempts') IS NOT NULL
+       AND to_regclass('user_sessions') IS NOT NULL
+       AND to_regclass('idx_login_attempts_time') IS NOT NULL
+"""
+
+# Batched last_login stamps: one UPDATE for every login buffered since the last flush
+LAST_LOGIN_UPDATE_SQL = """
+    UPDATE users SET last_login = v.login_time
+    FROM (VALUES %s) AS v(id, login_time)
+    WHERE users.id = v.id
+"""
 
 class UserAuthenticator:
     def register_user(self, username: str, password: str, email: str = None, role: str = "user") -> Dict[str, Any]:
@@ -31,13 +75,47 @@ class UserAuthenticator:
     def __init__(self):
         """Initialize the authenticator with PostgreSQL connection"""
         self.session_timeout = 3600  # 1 hour in seconds
-        self.active_sessions = {}  # In-memory session storage
+        # In-memory session storage, kept in expiry order (least recently used first)
+        self.active_sessions = OrderedDict()
+        self._sessions_lock = threading.Lock()
+        
+        # bcrypt work factor; tune per host with BCRYPT_COST (set BCRYPT_CALIBRATE=1 for a recommendation)
+        self._bcrypt_cost = self._read_bcrypt_cost()
+        if os.getenv("BCRYPT_CALIBRATE") == "1":
+            self._calibrate_cost()
+        self._bcrypt_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="bcrypt")
+        # Verified for unknown usernames; hashed up front so the first miss costs no extra hash
+        self._dummy_hash = self._hash_password(secrets.token_urlsafe(16))
+        
+        # Session tokens are sliced from a buffer of os.urandom bytes refilled in bulk
+        self._rand_buf = b""
+        self._rand_off = 0
+        self._rand_pid = None
+        self._rand_lock = threading.Lock()
         
         # Initialize PostgreSQL connection
         self.db_connection = get_database_connection("postgresql")
         if not self.db_connection:
             raise Exception("Could not initialize database connection")
         
+        # Login attempts and last_login stamps are buffered and written in batches by a background flusher
+        self._attempt_queue = deque(maxlen=MAX_BUFFERED_WRITES)
+        self._last_logins = deque(maxlen=MAX_BUFFERED_WRITES)  # (user_id, login_time) to stamp on users.last_login
+        self._buffer_lock = threading.Lock()
+        self._flush_stop = threading.Event()
+        self._flush_thread = None
+        # The flusher is a daemon thread, so write whatever is still buffered at interpreter exit
+        atexit.register(self.close)
+        
+        # Shared session cache so other worker processes can validate our tokens
+        self._redis = None
+        redis_url = os.getenv("REDIS_URL")
+        if REDIS_AVAILABLE and redis_url:
+            try:
+                self._redis = redis.Redis.from_url(redis_url)
+            except Exception as e:
+                print(f"⚠️ Redis session cache unavailable: {str(e)}")
+        
         # Initialize database tables
         self._init_database()
         self._create_default_users()
@@ -45,109 +123,165 @@ class UserAuthenticator:
     def _init_database(self):
         """Initialize the user database tables in PostgreSQL"""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            # Create users table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    id SERIAL PRIMARY KEY,
-                    username VARCHAR(255) UNIQUE NOT NULL,
-                    password_hash VARCHAR(255) NOT NULL,
-                    email VARCHAR(255),
-                    role VARCHAR(50) DEFAULT 'user',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    last_login TIMESTAMP,
-                    is_active BOOLEAN DEFAULT TRUE
-                )
-            """)
-            
-            # Create login attempts table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS login_attempts (
-                    id SERIAL PRIMARY KEY,
-                    username VARCHAR(255) NOT NULL,
-                    ip_address VARCHAR(45),
-                    success BOOLEAN NOT NULL,
-                    attempt_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Create user sessions table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS user_sessions (
-                    id SERIAL PRIMARY KEY,
-                    username VARCHAR(255) NOT NULL,
-                    session_token VARCHAR(255) UNIQUE NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    expires_at TIMESTAMP NOT NULL,
-                    is_active BOOLEAN DEFAULT TRUE
-                )
-            """)
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                
+                # One catalog lookup instead of the DDL round-trips once the schema exists
+                cursor.execute(SCHEMA_EXISTS_SQL)
+                if cursor.fetchone()[0]:
+                    cursor.close()
+                    return
+                
+                # Create users table
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS users (
+                        id SERIAL PRIMARY KEY,
+                        username VARCHAR(255) UNIQUE NOT NULL,
+                        password_hash VARCHAR(255) NOT NULL,
+                        email VARCHAR(255),
+                        role VARCHAR(50) DEFAULT 'user',
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        last_login TIMESTAMP,
+                        is_active BOOLEAN DEFAULT TRUE
+                    )
+                """)
+                
+                # Create login attempts table
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS login_attempts (
+                        id SERIAL PRIMARY KEY,
+                        username VARCHAR(255) NOT NULL,
+                        ip_address VARCHAR(45),
+                        success BOOLEAN NOT NULL,
+                        attempt_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                
+                # Create user sessions table
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS user_sessions (
+                        id SERIAL PRIMARY KEY,
+                        username VARCHAR(255) NOT NULL,
+                        session_token VARCHAR(255) UNIQUE NOT NULL,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        expires_at TIMESTAMP NOT NULL,
+                        is_active BOOLEAN DEFAULT TRUE
+                    )
+                """)
+                
+                # Index the recent-attempts listing
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_login_attempts_time
+                    ON login_attempts(attempt_time DESC)
+                """)
+                
+                conn.commit()
+                cursor.close()
             print("✅ User authentication tables created successfully in PostgreSQL")
-            
+        
         except Exception as e:
             print(f"❌ Error initializing user database: {str(e)}")
     
-    def _get_connection(self):
-        """Get PostgreSQL database connection"""
+    @contextmanager
+    def _connection(self):
+        """Borrow a connection from the process-wide engine pool and return it afterwards"""
         try:
-            if self.db_connection and self.db_connection.manager:
-                # Get connection parameters from the config
-                params = self.db_connection.manager.config.get_connection_params()
-                return psycopg2.connect(**params)
-            else:
+            if not (self.db_connection and self.db_connection.config):
                 raise Exception("Database connection not initialized")
+            conn = get_shared_engine(self.db_connection.config).raw_connection()
         except Exception as e:
             print(f"❌ Database connection error: {str(e)}")
             raise
+        
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            # Returns the connection to the shared pool (uncommitted work is rolled back)
+            conn.close()
+    
+    def close(self):
+        """Flush buffered writes; the shared connection pool stays open for other users"""
+        self._flush_stop.set()
+        if self._flush_thread is not None:
+            self._flush_thread.join()
+            self._flush_thread = None
+        self._flush_buffers()
     
     def _create_default_users(self):
         """Create default users if no users exist"""
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM users")
-            user_count = cursor.fetchone()[0]
-            
-            if user_count == 0:
-                # Create default admin user
-                admin_password = "admin123"  # Change this in production!
-                admin_hash = self._hash_password(admin_password)
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                # EXISTS stops at the first row instead of counting the whole table
+                cursor.execute("SELECT EXISTS(SELECT 1 FROM users)")
+                has_users = cursor.fetchone()[0]
                 
-                cursor.execute("""
-                    INSERT INTO users (username, password_hash, email, role)
-                    VALUES (%s, %s, %s, %s)
-                """, ("admin", admin_hash, "admin@company.com", "admin"))
-                
-                # Create default regular user
-                user_password = "user123"
-                user_hash = self._hash_password(user_password)
-                
-                cursor.execute("""
-                    INSERT INTO users (username, password_hash, email, role)
-                    VALUES (%s, %s, %s, %s)
-                """, ("user", user_hash, "user@company.com", "user"))
+                if not has_users:
+                    # Create default admin user
+                    admin_password = "admin123"  # Change this in production!
+                    admin_hash = self._hash_password(admin_password)
+                    
+                    cursor.execute("""
+                        INSERT INTO users (username, password_hash, email, role)
+                        VALUES (%s, %s, %s, %s)
+                    """, ("admin", admin_hash, "admin@company.com", "admin"))
+                    
+                    # Create default regular user
+                    user_password = "user123"
+                    user_hash = self._hash_password(user_password)
+                    
+                    cursor.execute("""
+                        INSERT INTO users (username, password_hash, email, role)
+                        VALUES (%s, %s, %s, %s)
+                    """, ("user", user_hash, "user@company.com", "user"))
+                    
+                    conn.commit()
+                    print("🔐 Default users created:")
+                    print("   Admin: username='admin', password='admin123'")
+                    print("   User: username='user', password='user123'")
+                    print("⚠️  Please change default passwords in production!")
                 
-                conn.commit()
                 cursor.close()
-                conn.close()
-                print("🔐 Default users created:")
-                print("   Admin: username='admin', password='admin123'")
-                print("   User: username='user', password='user123'")
-                print("⚠️  Please change default passwords in production!")
-                
+        
         except Exception as e:
             print(f"❌ Error creating default users: {str(e)}")
     
+    @staticmethod
+    def _read_bcrypt_cost(default: int = 12) -> int:
+        """Read the bcrypt cost from BCRYPT_COST, falling back to the default"""
+        try:
+            cost = int(os.getenv("BCRYPT_COST", str(default)))
+        except ValueError:
+            cost = default
+        
+        # bcrypt accepts 4..31 rounds
+        if not 4 <= cost <= 31:
+            print(f"⚠️ Invalid BCRYPT_COST={cost}, using {default}")
+            cost = default
+        return cost
+    
+    def _calibrate_cost(self, target_ms: float = 250.0) -> int:
+        """Time bcrypt at costs 10-14 and report the highest one within target_ms"""
+        recommended = 10
+        for rounds in range(10, 15):
+            start = time.perf_counter()
+            bcrypt.hashpw(b"calibration", bcrypt.gensalt(rounds=rounds))
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            print(f"⏱️ bcrypt cost {rounds}: {elapsed_ms:.0f} ms")
+            if elapsed_ms > target_ms:
+                break
+            recommended = rounds
+        
+        print(f"💡 Recommended BCRYPT_COST for ~{target_ms:.0f} ms per hash: {recommended} (current: {self._bcrypt_cost})")
+        return recommended
+    
     def _hash_password(self, password: str) -> str:
         """Hash password using bcrypt"""
         password_bytes = password.encode('utf-8')
-        salt = bcrypt.gensalt()
+        salt = bcrypt.gensalt(rounds=self._bcrypt_cost)
         hashed = bcrypt.hashpw(password_bytes, salt)
         return hashed.decode('utf-8')
     
@@ -173,46 +307,55 @@ class UserAuthenticator:
         }
         
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            # Get user from database; the connection goes back to the pool before bcrypt runs
+            with self._connection() as conn:
+                from psycopg2.extras import RealDictCursor
+                cursor = conn.cursor(cursor_factory=RealDictCursor)
+                cursor.execute("""
+                    SELECT id, username, password_hash, email, role, is_active
+                    FROM users
+                    WHERE username = %s AND is_active = TRUE
+                """, (username,))
+                
+                user_data = cursor.fetchone()
+                cursor.close()
             
-            # Get user from database
-            cursor.execute("""
-                SELECT id, username, password_hash, email, role, is_active
-                FROM users 
-                WHERE username = %s AND is_active = TRUE
-            """, (username,))
+            # Unknown usernames are checked against a dummy hash so both paths cost one
+            # bcrypt verify. Best effort only: the DB lookup and GIL scheduling still
+            # add some jitter, but the dominant bcrypt cost no longer reveals membership.
+            stored_hash = user_data['password_hash'] if user_data else self._dummy_hash
             
-            user_data = cursor.fetchone()
+            # bcrypt releases the GIL, so concurrent logins verify in parallel on the pool
+            password_ok = self._bcrypt_pool.submit(
+                self._verify_password, password, stored_hash
+            ).result()
+            password_ok = password_ok and user_data is not None and hmac.compare_digest(
+                user_data['username'].encode('utf-8'), username.encode('utf-8')
+            )
             
-            if user_data and self._verify_password(password, user_data['password_hash']):
+            if password_ok:
                 # Successful authentication
                 user_id = user_data['id']
                 
-                # Update last login
-                cursor.execute("""
-                    UPDATE users SET last_login = CURRENT_TIMESTAMP 
-                    WHERE id = %s
-                """, (user_id,))
+                # Log the successful attempt and stamp last_login through the batched flusher
+                with self._buffer_lock:
+                    self._buffer(self._last_logins, (user_id, datetime.now()))
+                self._record_attempt(username, ip_address, True)
                 
                 # Create session token
-                session_token = secrets.token_urlsafe(32)
+                session_token = self._next_token()
                 session_data = {
                     "user_id": user_id,
                     "username": user_data['username'],
                     "email": user_data['email'],
                     "role": user_data['role'],
                     "login_time": datetime.now(),
-                    "expires_at": datetime.now() + timedelta(seconds=self.session_timeout)
+                    "expires_at": datetime.now() + timedelta(seconds=self.session_timeout),
+                    "_checked_at": time.monotonic()
                 }
                 
-                self.active_sessions[session_token] = session_data
-                
-                # Log successful attempt
-                cursor.execute("""
-                    INSERT INTO login_attempts (username, ip_address, success)
-                    VALUES (%s, %s, %s)
-                """, (username, ip_address, True))
+                self._store_session(session_token, session_data)
+                self._cache_session(session_token, session_data)
                 
                 result.update({
                     "success": True,
@@ -225,39 +368,132 @@ class UserAuthenticator:
                     },
                     "session_token": session_token
                 })
-                
+            
             else:
-                # Failed authentication
-                cursor.execute("""
-                    INSERT INTO login_attempts (username, ip_address, success)
-                    VALUES (%s, %s, %s)
-                """, (username, ip_address, False))
+                # Failed authentication (buffered; last_login is left untouched)
+                self._record_attempt(username, ip_address, False)
                 
                 result["message"] = "Invalid username or password"
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
-                
+        
         except Exception as e:
             result["message"] = f"Authentication error: {str(e)}"
         
         return result
     
+    def _next_token(self, nbytes: int = 32) -> str:
+        """Return a URL-safe session token (same format as secrets.token_urlsafe)"""
+        with self._rand_lock:
+            # Refill when exhausted, and after a fork so child processes never share bytes
+            if self._rand_off + nbytes > len(self._rand_buf) or self._rand_pid != os.getpid():
+                self._rand_buf = os.urandom(RANDOM_BUFFER_SIZE)
+                self._rand_off = 0
+                self._rand_pid = os.getpid()
+            chunk = self._rand_buf[self._rand_off:self._rand_off + nbytes]
+            self._rand_off += nbytes
+        return base64.urlsafe_b64encode(chunk).rstrip(b"=").decode("ascii")
+    
+    def _store_session(self, session_token: str, session_data: Dict[str, Any]):
+        """Add a session to the in-memory store, evicting the oldest beyond MAX_ACTIVE_SESSIONS"""
+        with self._sessions_lock:
+            self.active_sessions[session_token] = session_data
+            self.active_sessions.move_to_end(session_token)
+            while len(self.active_sessions) > MAX_ACTIVE_SESSIONS:
+                self.active_sessions.popitem(last=False)
+    
+    def _cache_session(self, session_token: str, session_data: Dict[str, Any]):
+        """Store a session in Redis with the session timeout as TTL"""
+        if not self._redis:
+            return
+        try:
+            shared = {k: v for k, v in session_data.items() if k != "_checked_at"}
+            self._redis.setex(
+                f"memsess:{session_token}",
+                self.session_timeout,
+                json.dumps(shared, default=str)
+            )
+        except Exception as e:
+            print(f"⚠️ Redis session cache error: {str(e)}")
+    
+    def _load_cached_session(self, session_token: str) -> Optional[Dict[str, Any]]:
+        """Load a session from Redis (another worker process may have created it)"""
+        if not self._redis:
+            return None
+        try:
+            key = f"memsess:{session_token}"
+            cached = self._redis.get(key)
+            if not cached:
+                return None
+            session_data = json.loads(cached)
+            session_data["login_time"] = datetime.fromisoformat(session_data["login_time"])
+            session_data["expires_at"] = datetime.now() + timedelta(seconds=self.session_timeout)
+            return session_data
+        except Exception as e:
+            print(f"⚠️ Redis session cache error: {str(e)}")
+            return None
+    
+    def _session_still_active(self, session_token: str) -> bool:
+        """Check the shared store that no worker has ended this session
+        
+        Logout deletes the Redis key, so a missing key means the session is gone.
+        Without Redis this process's memory is the only store, so the session stays;
+        persisted sessions (user_sessions) are owned by the API layer in backend_api/main.py.
+        Redis errors keep the session (auth falls back to this process's memory).
+        """
+        if not self._redis:
+            return True
+        try:
+            return bool(self._redis.exists(f"memsess:{session_token}"))
+        except Exception as e:
+            print(f"⚠️ Redis session cache error: {str(e)}")
+            return True
+    
+    def _drop_cached_session(self, session_token: str):
+        """Remove a session from Redis"""
+        if not self._redis:
+            return
+        try:
+            self._redis.delete(f"memsess:{session_token}")
+        except Exception as e:
+            print(f"⚠️ Redis session cache error: {str(e)}")
+    
     def validate_session(self, session_token: str) -> Dict[str, Any]:
         """Validate session token and return user info"""
-        if not session_token or session_token not in self.active_sessions:
+        if not session_token:
             return {"valid": False, "message": "Invalid session"}
         
-        session_data = self.active_sessions[session_token]
+        with self._sessions_lock:
+            session_data = self.active_sessions.get(session_token)
+        
+        now = time.monotonic()
+        if session_data is not None and now - session_data.get("_checked_at", 0) >= SESSION_RECHECK_SECONDS:
+            # The local copy may be stale: another worker could have handled the logout
+            if not self._session_still_active(session_token):
+                with self._sessions_lock:
+                    self.active_sessions.pop(session_token, None)
+                return {"valid": False, "message": "Session ended"}
+            session_data["_checked_at"] = now
+        
+        if session_data is None:
+            # Session may have been created by another worker process
+            session_data = self._load_cached_session(session_token)
+            if session_data is None:
+                return {"valid": False, "message": "Invalid session"}
+            session_data["_checked_at"] = now
+            self._store_session(session_token, session_data)
         
-        # Check if session expired
-        if datetime.now() > session_data["expires_at"]:
-            del self.active_sessions[session_token]
-            return {"valid": False, "message": "Session expired"}
+        with self._sessions_lock:
+            # Check if session expired
+            if datetime.now() > session_data["expires_at"]:
+                self.active_sessions.pop(session_token, None)
+                return {"valid": False, "message": "Session expired"}
+            
+            # Extend session; moving it to the end keeps the dict ordered by expiry
+            session_data["expires_at"] = datetime.now() + timedelta(seconds=self.session_timeout)
+            if session_token in self.active_sessions:
+                self.active_sessions.move_to_end(session_token)
         
-        # Extend session
-        session_data["expires_at"] = datetime.now() + timedelta(seconds=self.session_timeout)
+        # Extend the shared copy's TTL as well
+        self._cache_session(session_token, session_data)
         
         return {
             "valid": True,
@@ -271,72 +507,146 @@ class UserAuthenticator:
     
     def logout(self, session_token: str) -> bool:
         """Logout user by removing session"""
-        if session_token in self.active_sessions:
-            del self.active_sessions[session_token]
-            return True
-        return False
+        self._drop_cached_session(session_token)
+        with self._sessions_lock:
+            return self.active_sessions.pop(session_token, None) is not None
     
     def create_user(self, username: str, password: str, email: str = None, role: str = "user") -> Dict[str, Any]:
         """Create new user account"""
         result = {"success": False, "message": ""}
         
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            
-            # Check if username exists
-            cursor.execute("SELECT username FROM users WHERE username = %s", (username,))
-            if cursor.fetchone():
-                result["message"] = "Username already exists"
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                
+                # Check if username exists
+                cursor.execute("SELECT username FROM users WHERE username = %s", (username,))
+                if cursor.fetchone():
+                    result["message"] = "Username already exists"
+                    cursor.close()
+                    return result
+                
+                # Create user
+                password_hash = self._hash_password(password)
+                cursor.execute("""
+                    INSERT INTO users (username, password_hash, email, role)
+                    VALUES (%s, %s, %s, %s)
+                """, (username, password_hash, email, role))
+                
+                conn.commit()
                 cursor.close()
-                conn.close()
-                return result
-            
-            # Create user
-            password_hash = self._hash_password(password)
-            cursor.execute("""
-                INSERT INTO users (username, password_hash, email, role)
-                VALUES (%s, %s, %s, %s)
-            """, (username, password_hash, email, role))
-            
-            conn.commit()
-            cursor.close()
-            conn.close()
             result.update({
                 "success": True,
                 "message": "User created successfully"
             })
-            
+        
         except Exception as e:
             result["message"] = f"Error creating user: {str(e)}"
         
         return result
     
+    def _record_attempt(self, username: str, ip_address: Optional[str], success: bool):
+        """Queue a login attempt for the background flusher"""
+        with self._buffer_lock:
+            self._buffer(self._attempt_queue, (username, ip_address, success, datetime.now()))
+    
+    def _buffer(self, queue: deque, item):
+        """Queue a write for the flusher, dropping the oldest when full (caller holds _buffer_lock)"""
+        if len(queue) == queue.maxlen:
+            print(f"⚠️ Auth write buffer full ({queue.maxlen}); dropping oldest entry")
+        queue.append(item)
+        self._start_flusher()
+    
+    def _start_flusher(self):
+        """Start the background flusher on first use (caller holds _buffer_lock)"""
+        if self._flush_thread is None and not self._flush_stop.is_set():
+            self._flush_thread = threading.Thread(
+                target=self._flush_loop, name="auth-buffer-flusher", daemon=True
+            )
+            self._flush_thread.start()
+    
+    def _flush_loop(self):
+        """Write buffered login attempts and last_login stamps about once per second"""
+        while not self._flush_stop.wait(1.0):
+            self._flush_buffers()
+    
+    def _flush_buffers(self, batch_size: int = 500) -> int:
+        """Write buffered login attempts and last_login stamps, one transaction per batch
+        
+        Each buffer is committed on its own, so a failing table cannot hold back the other.
+        """
+        flushed = 0
+        
+        for queue, write in ((self._attempt_queue, self._write_attempts),
+                             (self._last_logins, self._write_last_logins)):
+            while True:
+                with self._buffer_lock:
+                    batch = [queue.popleft() for _ in range(min(batch_size, len(queue)))]
+                if not batch:
+                    break
+                
+                try:
+                    with self._connection() as conn:
+                        cursor = conn.cursor()
+                        write(cursor, batch, batch_size)
+                        conn.commit()
+                        cursor.close()
+                    flushed += len(batch)
+                except Exception as e:
+                    print(f"❌ Error writing buffered auth data: {str(e)}")
+                    # Keep the batch for the next flush (up to MAX_BUFFERED_WRITES per buffer)
+                    with self._buffer_lock:
+                        queue.extendleft(reversed(batch))
+                    break
+        
+        return flushed
+    
+    @staticmethod
+    def _write_attempts(cursor, attempts: list, page_size: int):
+        """Insert a batch of (username, ip_address, success, attempt_time) rows"""
+        from psycopg2.extras import execute_values
+        execute_values(cursor, """
+            INSERT INTO login_attempts (username, ip_address, success, attempt_time)
+            VALUES %s
+        """, attempts, page_size=page_size)
+    
+    @staticmethod
+    def _write_last_logins(cursor, last_logins: list, page_size: int):
+        """Stamp users.last_login from a batch of (user_id, login_time) pairs"""
+        from psycopg2.extras import execute_values
+        # Latest login per user, so each users row is updated once
+        latest = {}
+        for user_id, login_time in last_logins:
+            latest[user_id] = max(login_time, latest.get(user_id, login_time))
+        execute_values(cursor, LAST_LOGIN_UPDATE_SQL, list(latest.items()), page_size=page_size)
+    
     def get_login_attempts(self, limit: int = 10) -> list:
         """Get recent login attempts for monitoring"""
+        # Make sure buffered attempts are visible
+        self._flush_buffers()
+        
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            cursor.execute("""
-                SELECT username, ip_address, success, attempt_time
-                FROM login_attempts 
-                ORDER BY attempt_time DESC 
-                LIMIT %s
-            """, (limit,))
-            
-            attempts = []
-            for row in cursor.fetchall():
-                attempts.append({
-                    "username": row['username'],
-                    "ip_address": row['ip_address'],
-                    "success": bool(row['success']),
-                    "attempt_time": row['attempt_time']
-                })
-            
-            cursor.close()
-            conn.close()
+            with self._connection() as conn:
+                from psycopg2.extras import RealDictCursor
+                if limit > LOGIN_ATTEMPTS_STREAM_THRESHOLD:
+                    # Large audit pulls stream from a server-side cursor in chunks
+                    cursor = conn.cursor(name="login_attempts_stream", cursor_factory=RealDictCursor)
+                    cursor.itersize = 500
+                else:
+                    cursor = conn.cursor(cursor_factory=RealDictCursor)
+                cursor.execute("""
+                    SELECT username, ip_address, success, attempt_time
+                    FROM login_attempts
+                    ORDER BY attempt_time DESC
+                    LIMIT %s
+                """, (limit,))
+                
+                # RealDictCursor rows already carry the column names (success is NOT NULL boolean)
+                attempts = [dict(row) for row in cursor]
+                
+                cursor.close()
             return attempts
-            
+        
         except Exception as e:
             print(f"❌ Error getting login attempts: {str(e)}")
             return []
@@ -344,15 +654,33 @@ class UserAuthenticator:
     def cleanup_expired_sessions(self):
         """Remove expired sessions"""
         current_time = datetime.now()
-        expired_tokens = [
-            token for token, data in self.active_sessions.items()
-            if current_time > data["expires_at"]
-        ]
+        removed = 0
         
-        for token in expired_tokens:
-            del self.active_sessions[token]
+        # Sessions are ordered by expiry, so stop at the first one still valid
+        with self._sessions_lock:
+            while self.active_sessions:
+                data = next(iter(self.active_sessions.values()))
+                if current_time <= data["expires_at"]:
+                    break
+                self.active_sessions.popitem(last=False)
+                removed += 1
         
-        return len(expired_tokens)
+        return removed
+
+# Global authenticator instance, created on first use rather than at import
+_auth_manager = None
+_auth_manager_lock = threading.Lock()
+
+def get_auth_manager() -> UserAuthenticator:
+    """Return the shared UserAuthenticator, creating it on first call"""
+    global _auth_manager
+    with _auth_manager_lock:
+        if _auth_manager is None:
+            _auth_manager = UserAuthenticator()
+    return _auth_manager
 
-# Global authenticator instance
-auth_manager = UserAuthenticator()
\ No newline at end of file
+def __getattr__(name):
+    # Keeps `from auth.user_auth import auth_manager` working (PEP 562)
+    if name == "auth_manager":
+        return get_auth_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
@@ -1 +1,8 @@
 # This file makes backend_api a Python package.
+import os
+import sys
+
+# Make the repository root importable (auth, database_config, scrapers) once per process
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
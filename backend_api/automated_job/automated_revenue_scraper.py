@@ -4,6 +4,7 @@ Automated wrapper for revenue scraper used in scheduled jobs.
 import logging
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +14,9 @@ scrapers_dir = os.path.join(parent_dir, '..', 'scrapers')
 if scrapers_dir not in sys.path:
     sys.path.insert(0, scrapers_dir)
 
+# Revenue lookups are network-bound, so they run concurrently on a thread pool
+REVENUE_WORKERS = int(os.getenv('REV_WORKERS', '32'))
+
 class AutomatedRevenueScraper:
     def __init__(self):
         self.scraper = None
@@ -43,6 +47,14 @@ class AutomatedRevenueScraper:
             logger.debug(f"estimate_revenue fallback failed: {e}")
             raise
 
+    def _lookup_revenue(self, company_name, website):
+        """Fetch revenue for one company; returns (True, result) or (False, error status)"""
+        try:
+            return True, self.scraper.get_company_revenue(company_name, website)
+        except Exception as e:
+            logger.debug(f"Revenue lookup failed for {company_name}: {e}")
+            return False, f"Error: {e}"
+
     def process_companies(self, df, company_name_column='Company Name'):
         if self.scraper is None:
             self.initialize()
@@ -61,19 +73,47 @@ class AutomatedRevenueScraper:
                 if c not in df.columns:
                     df[c] = None
 
-            for idx, row in df.iterrows():
-                company_name = row.get(company_name_column, '')
-                website = row.get('Website') or row.get('Website_URL') or row.get('Company_Website') or ''
-                try:
-                    result = self.scraper.get_company_revenue(company_name, website)
-                    df.at[idx, rev_col] = result.get('revenue')
-                    df.at[idx, src_col] = result.get('source')
-                    df.at[idx, src_url_col] = result.get('source_url')
-                    df.at[idx, status_col] = result.get('status')
-                except Exception as e:
-                    logger.debug(f"Revenue lookup failed for {company_name}: {e}")
-                    df.at[idx, status_col] = f"Error: {e}"
+            # Pull the inputs out column-wise instead of building a Series per row
+            row_count = len(df)
+            if company_name_column in df.columns:
+                names = df[company_name_column].fillna('').tolist()
+            else:
+                names = [''] * row_count
+            website_columns = [
+                df[c].fillna('').tolist()
+                for c in ('Website', 'Website_URL', 'Company_Website') if c in df.columns
+            ]
+            if website_columns:
+                websites = [next((w for w in candidates if w), '') for candidates in zip(*website_columns)]
+            else:
+                websites = [''] * row_count
+            tasks = list(zip(names, websites))
+
+            if not tasks:
+                return df
+
+            # Start from the existing values so failed lookups only change the status
+            revs = df[rev_col].tolist()
+            srcs = df[src_col].tolist()
+            urls = df[src_url_col].tolist()
+            stats = df[status_col].tolist()
+
+            workers = max(1, min(REVENUE_WORKERS, len(tasks)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='revenue') as executor:
+                results = executor.map(lambda task: self._lookup_revenue(*task), tasks)
+                for pos, (ok, result) in enumerate(results):
+                    if ok:
+                        revs[pos] = result.get('revenue')
+                        srcs[pos] = result.get('source')
+                        urls[pos] = result.get('source_url')
+                        stats[pos] = result.get('status')
+                    else:
+                        stats[pos] = result
 
+            df[rev_col] = revs
+            df[src_col] = srcs
+            df[src_url_col] = urls
+            df[status_col] = stats
             return df
         except Exception as e:
             logger.error(f"AutomatedRevenueScraper: Processing failed: {e}")
@@ -12,13 +12,15 @@ import io
 import json
 import base64
 import logging
+import multiprocessing
 import os
+import re
 import sys
-from typing import Any
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Optional
 
 import pandas as pd
 
-from database_config.postgresql_config import PostgreSQLConfig
 
 logger = logging.getLogger("automated_job.runner")
 logging.basicConfig(level=logging.INFO)
@@ -26,118 +28,219 @@ logging.basicConfig(level=logging.INFO)
 # Make sure scrapers path will resolve as in wrappers
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# Prefer the native multi-threaded/Rust parsers when they are installed
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    CSV_ENGINE = 'c'
 
-def normalize_raw_data_to_df(raw_data: Any) -> pd.DataFrame:
-    """Normalize various stored raw_data formats into a pandas DataFrame.
+# Excel reader engine: calamine when installed and supported by this pandas
+from database_config.excel_engine import EXCEL_ENGINE
 
-    Accepts: bytes, dict, JSON string, base64-encoded bytes, CSV/text
-    Returns: DataFrame
-    Raises: ValueError on failure
-    """
-    import io as _io
 
-    # Bytes (assume Excel)
-    if isinstance(raw_data, (bytes, bytearray)):
-        try:
-            return pd.read_excel(_io.BytesIO(bytes(raw_data)))
-        except Exception as e:
-            # try CSV
-            try:
-                return pd.read_csv(_io.BytesIO(bytes(raw_data)))
-            except Exception:
-                raise ValueError(f"Unable to read bytes raw_data as Excel/CSV: {e}")
+# Leading bytes of the binary formats accepted by normalize_raw_data_to_df
+XLSX_MAGIC = b'PK\x03\x04'
+XLS_MAGIC = b'\xd0\xcf\x11\xe0'
+
+# Base64 payload once whitespace/newlines are removed (CSV text contains separators)
+BASE64_RE = re.compile(r'[A-Za-z0-9+/]+={0,2}')
 
+
+def _looks_like_json(head) -> bool:
+    return head.lstrip()[:1] in ('{', '[', b'{', b'[')
+
+
+def _normalize_dict(raw_data: dict) -> pd.DataFrame:
     # Dict (expect {'data': [...]} or records)
-    if isinstance(raw_data, dict):
-        if 'data' in raw_data and isinstance(raw_data['data'], list):
-            return pd.DataFrame(raw_data['data'])
-        # try to coerce
-        return pd.DataFrame(raw_data)
-
-    # String
-    if isinstance(raw_data, str):
-        # Try JSON
-        try:
-            parsed = json.loads(raw_data)
-            return normalize_raw_data_to_df(parsed)
-        except Exception:
-            pass
+    if isinstance(raw_data.get('data'), list):
+        return pd.DataFrame(raw_data['data'])
+    # try to coerce
+    return pd.DataFrame(raw_data)
+
+
+def _normalize_list(raw_data: list) -> pd.DataFrame:
+    return pd.DataFrame(raw_data)
 
-        # Try base64 decode
+
+def _from_json(text) -> Optional[pd.DataFrame]:
+    """Decode JSON text into a DataFrame; None when it is not valid JSON records"""
+    try:
+        parsed = json.loads(text)
+    except ValueError:
+        return None
+    handler = _NORMALIZERS.get(type(parsed))
+    if handler in (_normalize_dict, _normalize_list):
+        return handler(parsed)
+    return None
+
+
+def _parse_bytes(data: bytes) -> pd.DataFrame:
+    """Read raw file bytes, dispatching on the magic bytes instead of trial parsing"""
+    head = data[:8]
+
+    if head[:4] in (XLSX_MAGIC, XLS_MAGIC):
+        return pd.read_excel(io.BytesIO(data), engine=EXCEL_ENGINE)
+
+    if _looks_like_json(head):
+        df = _from_json(data)
+        if df is not None:
+            return df
+
+    # Anything else is treated as CSV
+    return pd.read_csv(io.BytesIO(data), engine=CSV_ENGINE)
+
+
+def _parse_str(text: str) -> pd.DataFrame:
+    """Parse JSON, base64-encoded file bytes (single- or multi-line) or CSV text"""
+    if _looks_like_json(text[:8]):
+        df = _from_json(text)
+        if df is not None:
+            return df
+
+    compact = ''.join(text.split())
+    if compact and len(compact) % 4 == 0 and BASE64_RE.fullmatch(compact):
+        # b64decode without validate=True skips the line breaks of wrapped base64
         try:
-            decoded = base64.b64decode(raw_data)
-            return normalize_raw_data_to_df(decoded)
+            return _parse_bytes(base64.b64decode(text))
         except Exception:
             pass
 
-        # Try to parse as CSV text
+    # The pyarrow engine only reads binary buffers
+    return pd.read_csv(io.BytesIO(text.encode('utf-8')), engine=CSV_ENGINE)
+
+
+def _normalize_bytes(raw_data) -> pd.DataFrame:
+    return _parse_bytes(bytes(raw_data))
+
+
+def _normalize_str(raw_data: str) -> pd.DataFrame:
+    return _parse_str(raw_data)
+
+
+_NORMALIZERS = {
+    bytes: _normalize_bytes,
+    bytearray: _normalize_bytes,
+    str: _normalize_str,
+    dict: _normalize_dict,
+    list: _normalize_list,
+}
+
+
+def normalize_raw_data_to_df(raw_data: Any) -> pd.DataFrame:
+    """Normalize various stored raw_data formats into a pandas DataFrame.
+
+    Accepts: bytes, dict, JSON string, base64-encoded bytes, CSV/text
+    Returns: DataFrame
+    Raises: ValueError on failure
+    """
+    for t in type(raw_data).__mro__:
+        handler = _NORMALIZERS.get(t)
+        if handler is None:
+            continue
         try:
-            return pd.read_csv(_io.StringIO(raw_data))
+            return handler(raw_data)
         except Exception as e:
-            raise ValueError(f"Unable to parse string raw_data: {e}")
+            raise ValueError(f"Unable to parse {t.__name__} raw_data: {e}")
 
     # Unknown
     raise ValueError("Unsupported raw_data type for reconstruction")
 
 
-def run_once(limit: int = 10):
-    cfg = PostgreSQLConfig()
-    params = cfg.get_connection_params()
-    import psycopg2
+# Files processed concurrently per batch (env RUNNER_WORKERS). Each worker process
+# scrapes LinkedIn for a whole file, so every extra worker multiplies the request
+# rate against its rate detection; keep this at 1-2 (see SCRAPER_WORKERS)
+RUNNER_WORKERS = int(os.getenv('RUNNER_WORKERS', '1'))
 
-    conn = psycopg2.connect(**params)
-    cursor = conn.cursor()
 
-    # Select pending uploads
-    cursor.execute("SELECT id, raw_data, file_name FROM file_upload WHERE processing_status = 'pending' ORDER BY upload_date ASC LIMIT %s", (limit,))
-    rows = cursor.fetchall()
-    if not rows:
-        logger.info("No pending uploads to process.")
-        cursor.close()
-        conn.close()
-        return {"success": True, "processed": 0, "successful": 0, "failed": 0}
+# One FileUploadProcessor (DB connection + scraper) per worker process, reused across files
+_PROCESSOR = None
+
+
+def _init_worker():
+    """Build the worker's FileUploadProcessor once, when the worker process starts
 
+    Workers are spawned, not forked: a forked child would inherit the parent's
+    pooled engines (and their open sockets), and two processes talking over the
+    same PostgreSQL connection corrupt its protocol stream.
+    """
+    global _PROCESSOR
     # Use the existing FileUploadProcessor to perform the canonical processing flow
     from database_config.file_upload_processor import FileUploadProcessor
 
-    success_count = 0
-    failure_count = 0
+    _PROCESSOR = FileUploadProcessor()
 
-    for r in rows:
-        file_id = r[0]
-        filename = r[2] or f"file_{file_id}"
 
-        logger.info(f"Processing pending file id={file_id} filename={filename} via FileUploadProcessor")
+def _process_one(file_id) -> bool:
+    """Process a single claimed upload; module-level so it can run in a worker process"""
+    global _PROCESSOR
+    if _PROCESSOR is None:
+        _init_worker()
+    fup = _PROCESSOR
 
+    try:
+        # This will mark the job as started, insert rows into company_data, perform scraping, and sync completion
+        ok = fup.process_uploaded_file(file_id)
+        if ok:
+            logger.info(f"✅ FileUploadProcessor processed file {file_id}")
+        else:
+            logger.error(f"❌ FileUploadProcessor failed for file {file_id}")
+        return bool(ok)
+
+    except Exception as e:
+        logger.exception(f"Processing failed for file {file_id}: {e}")
+        # Attempt to mark failed
         try:
-            fup = FileUploadProcessor()
-            # This will mark the job as started, insert rows into company_data, perform scraping, and sync completion
-            ok = fup.process_uploaded_file(file_id)
-            if ok:
-                success_count += 1
-                logger.info(f"✅ FileUploadProcessor processed file {file_id}")
-            else:
-                failure_count += 1
-                logger.error(f"❌ FileUploadProcessor failed for file {file_id}")
+            fup.sync_processing_completion(file_id, 'failed', 0, str(e))
+        except Exception as e2:
+            logger.error(f"Also failed to mark file {file_id} failed: {e2}")
+            # The processor looks broken; rebuild it for the next file
+            _PROCESSOR = None
+        return False
 
-        except Exception as e:
-            logger.exception(f"Processing failed for file {file_id}: {e}")
-            failure_count += 1
-            # Attempt to mark failed
-            try:
-                fup = FileUploadProcessor()
-                fup.sync_processing_completion(file_id, 'failed', 0, str(e))
-            except Exception as e2:
-                logger.error(f"Also failed to mark file {file_id} failed: {e2}")
-
-    total = success_count + failure_count
-    cursor.close()
-    conn.close()
-
-    return {"success": True, "processed": total, "successful": success_count, "failed": failure_count}
-
-    cursor.close()
-    conn.close()
+
+def run_once(limit: int = 10):
+    from database_config.file_upload_processor import FileUploadProcessor
+
+    # Claim pending uploads in one short transaction
+    processor = FileUploadProcessor()
+    claimed = processor.claim_pending_uploads(batch_size=limit)
+
+    if claimed is None or claimed.empty:
+        logger.info("No pending uploads to process.")
+        return {"success": True, "processed": 0, "successful": 0, "failed": 0}
+
+    for file_id, file_name in claimed.itertuples(index=False, name=None):
+        filename = file_name or f"file_{file_id}"
+        logger.info(f"Processing pending file id={file_id} filename={filename} via FileUploadProcessor")
+
+    file_ids = claimed['id'].tolist()
+    try:
+        return run_claimed(file_ids)
+    except Exception:
+        # Don't leave the batch stuck in 'processing' when the pool itself fails
+        released = processor.release_claimed_uploads(file_ids)
+        logger.error(f"Runner failed; released {released} claimed upload(s) back to 'pending'")
+        raise
+
+
+def run_claimed(file_ids):
+    """Process uploads already claimed (marked 'processing') by the caller"""
+    if not file_ids:
+        return {"success": True, "processed": 0, "successful": 0, "failed": 0}
+
+    workers = max(1, min(RUNNER_WORKERS, len(file_ids)))
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker
+    ) as executor:
+        results = list(executor.map(_process_one, file_ids))
+
+    success_count = sum(1 for ok in results if ok)
+    failure_count = len(results) - success_count
+
+    return {"success": True, "processed": len(results), "successful": success_count, "failed": failure_count}
 
 
 if __name__ == '__main__':
@@ -4,78 +4,242 @@ Company Data Processing Pipeline
 Integrates various scrapers for comprehensive company data extraction
 """
 
+import io
 import os
-import sys
 import pandas as pd
 import logging
+import threading
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, Any, Optional
 import time
 
-# Add scrapers directory to path
-current_dir = os.path.dirname(os.path.abspath(__file__))
-parent_dir = os.path.dirname(current_dir)
-scrapers_dir = os.path.join(parent_dir, 'scrapers')
-sys.path.insert(0, scrapers_dir)
+logger = logging.getLogger(__name__)
 
-# Add database config to path for database operations
-database_config_dir = os.path.join(parent_dir, 'database_config')
-sys.path.insert(0, database_config_dir)
+# Concurrent LinkedIn scraping workers per file (env SCRAPER_WORKERS). The scraper sleeps
+# 10-20s between requests and uses a fresh session per request to stay under LinkedIn's
+# rate detection, so every extra worker multiplies the request rate; keep this at 1-2
+SCRAPER_WORKERS = int(os.getenv('SCRAPER_WORKERS', '1'))
 
-logger = logging.getLogger(__name__)
+# company_data columns the processor may write
+_VALID_COLUMNS = frozenset({
+    'company_name', 'linkedin_url', 'company_website', 'company_size', 'industry',
+    'revenue', 'headquarters', 'founded_year', 'company_type', 'specialties',
+    'about_company', 'employee_count', 'file_source', 'upload_date',
+    'processing_status', 'scraped_at', 'data_source', 'created_by', 'updated_at',
+    'file_upload_id'
+})
+
+# Column order of the company_data table
+_ORDERED_COLUMNS = (
+    'company_name', 'linkedin_url', 'company_website', 'company_size', 'industry',
+    'revenue', 'file_source', 'created_by', 'updated_at', 'file_upload_id'
+)
+
+# Defaults for required columns missing from an upload; updated_at and
+# file_upload_id are always set per upload, so they have no static default
+_REQUIRED_DEFAULTS = MappingProxyType({
+    'company_name': '',
+    'linkedin_url': '',
+    'company_website': '',
+    'company_size': '',
+    'industry': '',
+    'revenue': '',
+    'file_source': 'unknown',
+    'created_by': 'system'
+})
+
+# Scraper classes are resolved once at import; None marks a scraper that is unavailable
+try:
+    from scrapers.linkedin_company_complete_scraper import CompleteCompanyScraper
+except ImportError as e:
+    logger.error(f"Failed to import LinkedIn scraper: {e}")
+    CompleteCompanyScraper = None
+
+try:
+    from scrapers.multi_source_revenue_scraper import MultiSourceRevenueScraper
+except ImportError as e:
+    logger.error(f"Failed to import Revenue scraper: {e}")
+    MultiSourceRevenueScraper = None
+
+try:
+    from scrapers.linkedin_openai_scraper import LinkedInOpenAIScraper
+except ImportError as e:
+    logger.error(f"Failed to import AI scraper: {e}")
+    LinkedInOpenAIScraper = None
+
+# Excel reader engine: calamine when installed and supported by this pandas
+from database_config.excel_engine import EXCEL_ENGINE
+
+# Stream Excel output row by row when xlsxwriter is installed
+try:
+    import xlsxwriter
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    XLSXWRITER_AVAILABLE = False
+
+def _column_writers(worksheet, df: pd.DataFrame) -> list:
+    """Pick one xlsxwriter write method per column from its dtype
+    
+    worksheet.write() inspects every value's type (and scans strings for
+    URLs and formulas) before dispatching; choosing the typed method once per
+    column skips that per-cell work. Mixed object columns keep write().
+    """
+    writers = []
+    for _, column in df.items():
+        if pd.api.types.is_bool_dtype(column):
+            writers.append(worksheet.write_boolean)
+        elif pd.api.types.is_numeric_dtype(column):
+            writers.append(worksheet.write_number)
+        elif pd.api.types.infer_dtype(column, skipna=True) == 'string':
+            writers.append(worksheet.write_string)
+        else:
+            writers.append(worksheet.write)
+    return writers
+
+def _write_excel(df: pd.DataFrame, buffer) -> None:
+    """Write df as an .xlsx workbook into buffer
+    
+    With xlsxwriter's constant_memory mode each row is flushed as soon as the
+    next one starts, so memory stays bounded by one row instead of the whole
+    sheet. Rows must be written in order, which pandas' column-major writer
+    does not do, hence the explicit row loop.
+    """
+    if not XLSXWRITER_AVAILABLE:
+        df.to_excel(buffer, index=False)
+        return
+    
+    workbook = xlsxwriter.Workbook(buffer, {
+        'constant_memory': True,
+        'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+        'remove_timezone': True,
+        # Strings in mixed columns (which still go through write()) stay plain text
+        'strings_to_urls': False,
+        'strings_to_formulas': False
+    })
+    try:
+        worksheet = workbook.add_worksheet('Sheet1')
+        worksheet.write_row(0, 0, [str(col) for col in df.columns])
+        writers = _column_writers(worksheet, df)
+        # Missing values become None and are skipped, leaving empty cells
+        rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+        for row_idx, row in enumerate(rows, start=1):
+            for col_idx, (write, value) in enumerate(zip(writers, row)):
+                if value is not None:
+                    write(row_idx, col_idx, value)
+    finally:
+        workbook.close()
 
 class CompanyDataProcessor:
     """Main processor that orchestrates different scrapers"""
 
+    # Scraper instances shared by every processor, one per scraper class
+    _shared_scrapers = {}
+    _scrapers_lock = threading.Lock()
+
     def __init__(self):
         self.linkedin_scraper = None
         self.revenue_scraper = None
         self.ai_scraper = None
+        self.engine = None
 
-        # Initialize database connection
+        # Initialize database connection (backed by the shared connection pool)
         try:
-            from db_utils import get_database_connection
+            from database_config.db_utils import get_database_connection
             self.db_connection = get_database_connection("postgresql")
-            if self.db_connection:
-                self.db_connection.connect()
+            if self.db_connection and self.db_connection.connect():
+                self.engine = self.db_connection.manager.engine
             logger.info("Database connection initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize database connection: {e}")
             self.db_connection = None
         
+    @classmethod
+    def _get_scraper(cls, scraper_class):
+        """Return the shared instance of scraper_class, creating it on first use"""
+        with cls._scrapers_lock:
+            scraper = cls._shared_scrapers.get(scraper_class)
+            if scraper is None:
+                scraper = scraper_class()
+                cls._shared_scrapers[scraper_class] = scraper
+            return scraper
+    
     def initialize_scrapers(self, scraping_enabled: bool = True, ai_analysis_enabled: bool = False):
         """Initialize required scrapers based on options"""
         scrapers_loaded = []
         
         if scraping_enabled:
-            try:
-                from linkedin_company_complete_scraper import CompleteCompanyScraper
-                self.linkedin_scraper = CompleteCompanyScraper()
+            if CompleteCompanyScraper:
+                self.linkedin_scraper = self._get_scraper(CompleteCompanyScraper)
                 scrapers_loaded.append("LinkedIn Company Scraper")
                 logger.info("LinkedIn scraper initialized successfully")
-            except ImportError as e:
-                logger.error(f"Failed to import LinkedIn scraper: {e}")
             
-            try:
-                from multi_source_revenue_scraper import MultiSourceRevenueScraper
-                self.revenue_scraper = MultiSourceRevenueScraper()
+            if MultiSourceRevenueScraper:
+                self.revenue_scraper = self._get_scraper(MultiSourceRevenueScraper)
                 scrapers_loaded.append("Multi-Source Revenue Scraper")
                 logger.info("Revenue scraper initialized successfully")
-            except ImportError as e:
-                logger.error(f"Failed to import Revenue scraper: {e}")
         
-        if ai_analysis_enabled:
-            try:
-                from linkedin_openai_scraper import LinkedInOpenAIScraper
-                self.ai_scraper = LinkedInOpenAIScraper()
-                scrapers_loaded.append("AI Analysis Scraper")
-                logger.info("AI scraper initialized successfully")
-            except ImportError as e:
-                logger.error(f"Failed to import AI scraper: {e}")
+        if ai_analysis_enabled and LinkedInOpenAIScraper:
+            self.ai_scraper = self._get_scraper(LinkedInOpenAIScraper)
+            scrapers_loaded.append("AI Analysis Scraper")
+            logger.info("AI scraper initialized successfully")
         
         return scrapers_loaded
     
+    def _scrape_in_parallel(self, df: pd.DataFrame, linkedin_col: str, website_col: str,
+                            company_name_col: str, update_progress) -> pd.DataFrame:
+        """Run the LinkedIn scraper over row chunks concurrently and reassemble them in order
+        
+        Progress (30-70%) is reported by the scraper itself as companies are scraped.
+        """
+        total_rows = len(df)
+        workers = max(1, min(SCRAPER_WORKERS, total_rows))
+        if workers == 1:
+            return self.linkedin_scraper.process_companies(
+                df,
+                linkedin_column=linkedin_col,
+                website_column=website_col,
+                company_name_column=company_name_col,
+                progress_callback=lambda done, total: update_progress(
+                    30 + int(done / total * 40), f"Processed {done}/{total} companies..."
+                )
+            )
+        
+        # A few chunks per worker keeps the pool busy when some companies are slow
+        chunk_size = max(1, -(-total_rows // (workers * 4)))
+        chunks = [df.iloc[start:start + chunk_size].copy() for start in range(0, total_rows, chunk_size)]
+        results = [None] * len(chunks)
+        chunk_done = [0] * len(chunks)
+        progress_lock = threading.Lock()
+        
+        def chunk_progress(position):
+            def report(done, _total):
+                with progress_lock:
+                    chunk_done[position] = done
+                    done_rows = sum(chunk_done)
+                update_progress(30 + int(done_rows / total_rows * 40), f"Processed {done_rows}/{total_rows} companies...")
+            return report
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scraper') as executor:
+            futures = {
+                executor.submit(
+                    self.linkedin_scraper.process_companies,
+                    chunk,
+                    linkedin_column=linkedin_col,
+                    website_column=website_col,
+                    company_name_column=company_name_col,
+                    progress_callback=chunk_progress(position)
+                ): position
+                for position, chunk in enumerate(chunks)
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        
+        return pd.concat(results)
+    
     def process_file(self, file_content: bytes = None, file_path: str = None, filename: str = "uploaded_file.xlsx",
-                    scraping_enabled: bool = True, ai_analysis_enabled: bool = False, progress_callback=None) -> Dict[str, Any]:
+                    scraping_enabled: bool = True, ai_analysis_enabled: bool = False, progress_callback=None,
+                    df: pd.DataFrame = None) -> Dict[str, Any]:
         """
         Process an Excel file with company data (NO local storage required)
         
@@ -86,6 +250,7 @@ class CompanyDataProcessor:
             scraping_enabled: Whether to enable web scraping
             ai_analysis_enabled: Whether to enable AI analysis
             progress_callback: Function to call with progress updates
+            df: Already-parsed company data; skips reading file_content/file_path
             
         Returns:
             Dictionary with processing results
@@ -99,16 +264,18 @@ class CompanyDataProcessor:
         try:
             update_progress(10, "Reading Excel file...")
             
-            # Read file from content or path (prefer content to avoid local storage)
-            if file_content:
-                import io
-                df = pd.read_excel(io.BytesIO(file_content))
+            # Use an already-parsed DataFrame, else read file from content or path
+            # (prefer content to avoid local storage)
+            if df is not None:
+                logger.info(f"✅ Using provided DataFrame ({len(df)} rows)")
+            elif file_content:
+                df = pd.read_excel(io.BytesIO(file_content), engine=EXCEL_ENGINE)
                 logger.info(f"✅ File read from memory content ({len(file_content)} bytes)")
             elif file_path:
-                df = pd.read_excel(file_path)
+                df = pd.read_excel(file_path, engine=EXCEL_ENGINE)
                 logger.info(f"✅ File read from path: {file_path}")
             else:
-                raise ValueError("Either file_content or file_path must be provided")
+                raise ValueError("Either df, file_content or file_path must be provided")
             
             total_rows = len(df)
             
@@ -128,12 +295,9 @@ class CompanyDataProcessor:
                 
                 logger.info(f"Using columns: LinkedIn='{linkedin_col}', Website='{website_col}', Company='{company_name_col}'")
                 
-                # Use the existing process_companies method
-                processed_df = self.linkedin_scraper.process_companies(
-                    df,
-                    linkedin_column=linkedin_col,
-                    website_column=website_col, 
-                    company_name_column=company_name_col
+                # Use the existing process_companies method on row chunks in parallel
+                processed_df = self._scrape_in_parallel(
+                    df, linkedin_col, website_col, company_name_col, update_progress
                 )
                 # Ensure columns are object dtype to avoid pandas FutureWarnings
                 try:
@@ -146,17 +310,11 @@ class CompanyDataProcessor:
                         except Exception:
                             processed_df[c] = processed_df[c].astype(str)
                 
-                # Track progress through the dataframe processing
-                for index, row in processed_df.iterrows():
-                    progress_percent = 30 + int((index / total_rows) * 40)
-                    update_progress(progress_percent, f"Processed {index + 1}/{total_rows} companies...")
-                    
-                    # Count successes and failures
-                    linkedin_status = row.get('LinkedIn_Status', 'Unknown')
-                    if linkedin_status == 'Success':
-                        successful_rows += 1
-                    else:
-                        failed_rows += 1
+                # Count successes and failures in one vectorized comparison
+                if 'LinkedIn_Status' in processed_df.columns:
+                    successful_rows = int((processed_df['LinkedIn_Status'] == 'Success').sum())
+                failed_rows = total_rows - successful_rows
+                update_progress(70, f"Processed {total_rows}/{total_rows} companies...")
                 
                 df = processed_df
                 
@@ -186,13 +344,13 @@ class CompanyDataProcessor:
             output_filename = f"processed_{name}_{int(time.time())}{ext}"
             
             # Create Excel content in memory (NO local storage)
-            import io
             excel_buffer = io.BytesIO()
-            df.to_excel(excel_buffer, index=False)
-            output_content = excel_buffer.getvalue()
-            excel_buffer.close()
+            _write_excel(df, excel_buffer)
+            output_size = excel_buffer.tell()
+            # Rewind and hand the buffer itself to the caller (no bytes copy)
+            excel_buffer.seek(0)
             
-            logger.info(f"✅ Generated Excel output in memory ({len(output_content)} bytes)")
+            logger.info(f"✅ Generated Excel output in memory ({output_size} bytes)")
             
             # Save the processed data to database
             saved_to_db = False
@@ -203,54 +361,6 @@ class CompanyDataProcessor:
                     update_progress(95, "Saving results to database...")
                     
                     # Prepare data for database with proper column mapping
-                    db_df = df.copy()
-                    
-                    # Add metadata columns
-                    db_df['file_source'] = filename
-                    db_df['upload_date'] = pd.Timestamp.now()
-                    db_df['processing_status'] = 'completed'
-                    db_df['scraped_at'] = pd.Timestamp.now()
-                    db_df['data_source'] = 'automated_scraping'
-                    db_df['created_by'] = 'CompanyDataProcessor'
-                    db_df['updated_at'] = pd.Timestamp.now()
-
-                    # Fetch file_upload_id from file_upload table using filename (with retries)
-                    file_upload_id = None
-                    def _fetch_file_upload_id():
-                        from sqlalchemy import text
-                        query = text("SELECT id FROM file_upload WHERE file_name = :filename ORDER BY upload_date DESC LIMIT 1")
-                        with self.db_connection.manager.engine.connect() as conn:
-                            result = conn.execute(query, {"filename": filename})
-                            return result.fetchone()
-
-                    # Retry loop for transient DB errors (e.g., SSL connection closed)
-                    fetch_attempts = 3
-                    for attempt in range(fetch_attempts):
-                        try:
-                            row = _fetch_file_upload_id()
-                            if row:
-                                file_upload_id = row[0]
-                            break
-                        except Exception as e:
-                            logger.warning(f"Attempt {attempt+1}/{fetch_attempts} - failed to fetch file_upload_id for '{filename}': {e}")
-                            # Try to reconnect the DB manager/engine
-                            try:
-                                if self.db_connection:
-                                    self.db_connection.connect()
-                                    logger.info("Reinitialized DB connection after failure")
-                            except Exception as _re:
-                                logger.warning(f"DB reconnect attempt failed: {_re}")
-                            time.sleep(2 * (attempt + 1))
-
-                    # ...existing code for column mapping and filtering...
-                    # Ensure file_upload_id is set for all rows just before insert
-                    if not file_upload_id:
-                        logger.error(f"❌ file_upload_id could not be determined for filename '{filename}'. Skipping company_data insert.")
-                        db_save_error = "file_upload_id missing"
-                        saved_to_db = False
-                    else:
-                        db_df['file_upload_id'] = file_upload_id
-                    
                     # Map columns to match database schema - prioritizing standardized template format
                     column_mapping = {
                         # Standardized format (from sample template) - PRIMARY
@@ -284,7 +394,7 @@ class CompanyDataProcessor:
                     }
                     
                     # Apply column mapping with smart merging for enhanced columns
-                    logger.info(f"Dataframe columns before mapping: {list(db_df.columns)}")
+                    logger.info(f"Dataframe columns before mapping: {list(df.columns)}")
                     
                     # Handle enhanced columns with priority: Enhanced > Standardized > Legacy
                     enhanced_mappings = [
@@ -293,8 +403,11 @@ class CompanyDataProcessor:
                         (['Revenue', 'Revenue_Enhanced'], 'revenue')
                     ]
                     
+                    # Pick the source column for every target up front and build the insert
+                    # frame from just those columns (no full copy, rename or projection of df)
+                    picks = {}
                     for source_cols, target_col in enhanced_mappings:
-                        available_cols = [col for col in source_cols if col in db_df.columns]
+                        available_cols = [col for col in source_cols if col in df.columns]
                         if available_cols:
                             # Prefer enhanced columns over original ones
                             enhanced_col = None
@@ -308,65 +421,42 @@ class CompanyDataProcessor:
                             
                             # Use enhanced if available, otherwise use original
                             source_col = enhanced_col if enhanced_col else original_col
-                            
-                            if source_col and source_col in db_df.columns:
-                                logger.info(f"Smart mapping: {source_col} -> {target_col}")
-                                db_df = db_df.rename(columns={source_col: target_col})
-                                
-                                # Remove the other columns to avoid conflicts
-                                for col in available_cols:
-                                    if col != source_col and col in db_df.columns:
-                                        logger.info(f"Removing duplicate column: {col}")
-                                        db_df = db_df.drop(columns=[col])
-                    
-                    # Apply remaining simple mappings
-                    simple_mappings = {k: v for k, v in column_mapping.items() 
-                                     if not any(k in sources for sources, _ in enhanced_mappings)}
+                            logger.info(f"Smart mapping: {source_col} -> {target_col}")
+                            picks[target_col] = source_col
                     
-                    for old_col, new_col in simple_mappings.items():
-                        if old_col in db_df.columns:
+                    # Apply remaining simple mappings (the first listed source wins)
+                    enhanced_sources = {col for sources, _ in enhanced_mappings for col in sources}
+                    for old_col, new_col in column_mapping.items():
+                        if old_col not in enhanced_sources and old_col in df.columns and new_col not in picks:
                             logger.info(f"Simple mapping: {old_col} -> {new_col}")
-                            db_df = db_df.rename(columns={old_col: new_col})
+                            picks[new_col] = old_col
                     
-                    # Remove columns that don't exist in the database schema
-                    # Get valid columns from the database
-                    valid_columns = [
-                        'company_name', 'linkedin_url', 'company_website', 'company_size', 'industry', 
-                        'revenue', 'headquarters', 'founded_year', 'company_type', 'specialties', 
-                        'about_company', 'employee_count', 'file_source', 'upload_date', 
-                        'processing_status', 'scraped_at', 'data_source', 'created_by', 'updated_at'
-                    ]
+                    # Columns already named after the schema pass through unchanged
+                    for col in df.columns:
+                        if col in _VALID_COLUMNS and col not in picks:
+                            picks[col] = col
                     
-                    # Add file_upload_id to valid columns if not present
-                    if 'file_upload_id' not in valid_columns:
-                        valid_columns.append('file_upload_id')
-                    columns_to_keep = [col for col in db_df.columns if col in valid_columns]
-                    db_df = db_df[columns_to_keep]
-                    # Ensure all required columns exist, add with default values if missing
-                    required_defaults = {
-                        'company_name': '',
-                        'linkedin_url': '',
-                        'company_website': '',
-                        'company_size': '',
-                        'industry': '',
-                        'revenue': '',
-                        'file_source': 'unknown',
-                        'created_by': 'system',
-                        'updated_at': pd.Timestamp.now(),
-                        'file_upload_id': file_upload_id
-                    }
-                    for col, default in required_defaults.items():
-                        if col not in db_df.columns:
-                            db_df[col] = default
-                            # Reorder columns to match table
-                            ordered_columns = [
-                                'company_name', 'linkedin_url', 'company_website', 'company_size', 'industry',
-                                'revenue', 'file_source', 'created_by', 'updated_at', 'file_upload_id'
-                            ]
-                            db_df = db_df[[col for col in ordered_columns if col in db_df.columns]]
-
-                            # Log file_upload_id value before insert
-                            logger.info(f"file_upload_id to be inserted: {file_upload_id}")
+                    db_df = pd.DataFrame({target: df[source] for target, source in picks.items()}, index=df.index)
+                    
+                    # Add metadata columns in one assign (one timestamp for the whole upload);
+                    # file_upload_id is looked up in the insert transaction, so only its slot is added now
+                    now_ts = pd.Timestamp.now()
+                    db_df = db_df.assign(
+                        file_source=filename,
+                        upload_date=now_ts,
+                        processing_status='completed',
+                        scraped_at=now_ts,
+                        data_source='automated_scraping',
+                        created_by='CompanyDataProcessor',
+                        updated_at=now_ts,
+                        file_upload_id=None
+                    )
+                    
+                    # Ensure all required columns exist (default values if missing) and put
+                    # them in table order ahead of the other schema columns, in one projection
+                    missing_defaults = {col: default for col, default in _REQUIRED_DEFAULTS.items() if col not in db_df.columns}
+                    extra_columns = [col for col in db_df.columns if col not in _ORDERED_COLUMNS]
+                    db_df = db_df.assign(**missing_defaults)[list(_ORDERED_COLUMNS) + extra_columns]
 
                     # Truncate 'industry' column to 500 characters to prevent DB errors
                     if 'industry' in db_df.columns:
@@ -374,35 +464,14 @@ class CompanyDataProcessor:
                     
                     logger.info(f"Prepared {len(db_df)} records with columns: {list(db_df.columns)}")
                     
-                    # Insert data into company_data table only if file_upload_id is present
-                    if file_upload_id:
-                        # Insert with retries for transient DB errors
-                        saved_to_db = False
-                        insert_attempts = 3
-                        for attempt in range(insert_attempts):
-                            try:
-                                saved_to_db = self.db_connection.insert_dataframe(db_df, "company_data")
-                                if saved_to_db:
-                                    break
-                            except Exception as ie:
-                                import traceback
-                                tb = traceback.format_exc()
-                                logger.warning(f"Attempt {attempt+1}/{insert_attempts} - insert failed: {ie}\n{tb}")
-                                db_save_error = str(ie)
-                                try:
-                                    if self.db_connection:
-                                        self.db_connection.connect()
-                                except Exception as _re:
-                                    logger.warning(f"DB reconnect attempt failed during insert: {_re}")
-                                time.sleep(2 * (attempt + 1))
-                    else:
-                        saved_to_db = False
+                    # Look up file_upload_id and insert the rows in a single transaction
+                    saved_to_db, db_save_error = self._save_company_data(db_df, filename)
                     
                     if saved_to_db:
                         logger.info(f"✅ Successfully saved {len(db_df)} company records to database")
                     else:
                         logger.error("❌ Failed to save data to database - insert operation failed")
-                        db_save_error = "Database insert operation failed"
+                        db_save_error = db_save_error or "Database insert operation failed"
                         
                 except Exception as e:
                     logger.error(f"❌ Error saving to database: {str(e)}")
@@ -424,7 +493,7 @@ class CompanyDataProcessor:
                 "failed_rows": failed_rows,
                 "processing_time": f"{processing_time} seconds",
                 "output_file": output_filename,
-                "output_content": output_content,  # Excel content in memory
+                "output_stream": excel_buffer,  # Excel content in memory (BytesIO, rewound)
                 "scrapers_used": scrapers_used,
                 "scraping_enabled": scraping_enabled,
                 "ai_analysis_enabled": ai_analysis_enabled,
@@ -449,6 +518,67 @@ class CompanyDataProcessor:
                 "processing_time": f"{round(time.time() - start_time, 2)} seconds"
             }
     
+    def _save_company_data(self, db_df: pd.DataFrame, filename: str, attempts: int = 3):
+        """
+        Find the file_upload row for filename and insert db_df into company_data
+        within one transaction, retrying transient DB errors (e.g. SSL connection closed)
+        
+        Rows are loaded with COPY ... FROM STDIN; if COPY rejects the data the
+        savepoint is rolled back and the rows are inserted with executemany instead.
+        
+        Returns:
+            tuple: (saved, error message or None)
+        """
+        from sqlalchemy import text, table, column
+        
+        lookup = text("SELECT id FROM file_upload WHERE file_name = :filename ORDER BY upload_date DESC LIMIT 1")
+        company_data = table("company_data", *(column(col) for col in db_df.columns))
+        columns = ", ".join(f'"{col}"' for col in db_df.columns)
+        copy_sql = f"COPY company_data ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        error = None
+        
+        for attempt in range(attempts):
+            try:
+                with self.engine.begin() as conn:
+                    file_upload_id = conn.execute(lookup, {"filename": filename}).scalar()
+                    if not file_upload_id:
+                        logger.error(f"❌ file_upload_id could not be determined for filename '{filename}'. Skipping company_data insert.")
+                        return False, "file_upload_id missing"
+                    
+                    logger.info(f"file_upload_id to be inserted: {file_upload_id}")
+                    insert_df = db_df.assign(file_upload_id=file_upload_id)
+                    
+                    buffer = io.StringIO()
+                    insert_df.to_csv(buffer, index=False, header=False, na_rep='\\N')
+                    buffer.seek(0)
+                    try:
+                        # COPY runs on the transaction's own DBAPI connection
+                        with conn.begin_nested():
+                            cursor = conn.connection.cursor()
+                            cursor.copy_expert(copy_sql, buffer)
+                            cursor.close()
+                    except Exception as copy_error:
+                        logger.warning(f"COPY into company_data failed, falling back to insert: {copy_error}")
+                        records = insert_df.astype(object).where(insert_df.notna(), None).to_dict(orient='records')
+                        # executemany: the driver batches the rows instead of one round-trip each
+                        conn.execute(company_data.insert(), records)
+                return True, None
+            
+            except Exception as e:
+                import traceback
+                logger.warning(f"Attempt {attempt+1}/{attempts} - insert failed: {e}\n{traceback.format_exc()}")
+                error = str(e)
+                # Try to reconnect the DB manager/engine
+                try:
+                    if self.db_connection and self.db_connection.connect():
+                        self.engine = self.db_connection.manager.engine
+                        logger.info("Reinitialized DB connection after failure")
+                except Exception as _re:
+                    logger.warning(f"DB reconnect attempt failed during insert: {_re}")
+                time.sleep(2 * (attempt + 1))
+        
+        return False, error
+    
     def get_supported_columns(self) -> Dict[str, list]:
         """Return the expected column names for different data types"""
         return {
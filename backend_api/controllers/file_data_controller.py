@@ -3,10 +3,11 @@ File Data Controller
 Handles HTTP requests for file data operations
 """
 
-from fastapi import APIRouter, HTTPException, Query, Path
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from fastapi.responses import StreamingResponse
 from typing import Optional, Dict, Any
 import logging
+from .session_dependency import verify_session
 from ..services.file_data_service import FileDataService
 from ..models.data_models import FileDataResponse
 
@@ -18,29 +19,15 @@ router = APIRouter(prefix="/api/file-data", tags=["File Data"])
 # Service instance
 file_service = FileDataService()
 
-def verify_session(session_id: str):
-    """Verify session - placeholder for actual session verification"""
-    # Import here to avoid circular imports
-    import sys
-    import os
-    sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-    from auth.user_auth import UserAuthenticator
-    
-    authenticator = UserAuthenticator()
-    return authenticator.verify_session(session_id)
-
 @router.get("/statistics/{file_id}")
 async def get_file_statistics(
     file_id: str = Path(..., description="File ID to get statistics for"),
-    session_id: str = Query(..., description="Session ID for authentication")
+    session: dict = Depends(verify_session)
 ) -> Dict[str, Any]:
     """
     Get processing statistics for a specific file
     """
     try:
-        # Verify session
-        verify_session(session_id)
-        
         # Get file statistics
         result = await file_service.get_file_statistics(file_id)
         
@@ -58,15 +45,12 @@ async def get_file_statistics(
 @router.get("/export/{file_id}")
 async def export_processed_data(
     file_id: str = Path(..., description="File ID to export data for"),
-    session_id: str = Query(..., description="Session ID for authentication")
+    session: dict = Depends(verify_session)
 ):
     """
     Export processed data as Excel file
     """
     try:
-        # Verify session
-        verify_session(session_id)
-        
         # Export data
         result = await file_service.export_processed_data(file_id)
         
@@ -74,8 +58,8 @@ async def export_processed_data(
             raise HTTPException(status_code=404, detail=result["message"])
         
         # Return Excel file
-        return Response(
-            content=result["data"],
+        return StreamingResponse(
+            result["stream"],
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             headers={
                 "Content-Disposition": f"attachment; filename={result['filename']}"
@@ -91,15 +75,12 @@ async def export_processed_data(
 @router.post("/reprocess/{file_id}", response_model=FileDataResponse)
 async def reprocess_file_data(
     file_id: str = Path(..., description="File ID to reprocess"),
-    session_id: str = Query(..., description="Session ID for authentication")
+    session: dict = Depends(verify_session)
 ):
     """
     Mark file data for reprocessing
     """
     try:
-        # Verify session
-        verify_session(session_id)
-        
         # Reprocess file data
         result = await file_service.reprocess_file_data(file_id)
         
@@ -117,15 +98,12 @@ async def reprocess_file_data(
 @router.delete("/{file_id}", response_model=FileDataResponse)
 async def delete_file_data(
     file_id: str = Path(..., description="File ID to delete"),
-    session_id: str = Query(..., description="Session ID for authentication")
+    session: dict = Depends(verify_session)
 ):
     """
     Delete file and all associated data
     """
     try:
-        # Verify session
-        verify_session(session_id)
-        
         # Delete file data
         result = await file_service.delete_file_data(file_id)
         
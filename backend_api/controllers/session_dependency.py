@@ -0,0 +1,44 @@
+"""
+Session Dependency
+Shared FastAPI dependency that verifies the session_id query parameter
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from fastapi import HTTPException, Query
+from auth.user_auth import get_auth_manager
+
+# Valid sessions are cached briefly so polling endpoints skip re-validation
+SESSION_CACHE_TTL_SECONDS = 60
+SESSION_CACHE_MAX_ENTRIES = 10000
+
+# session_id -> (cached_at, session); kept in insertion order for eviction
+_session_cache = OrderedDict()
+_session_cache_lock = threading.Lock()
+
+def verify_session(session_id: str = Query(..., description="Session ID for authentication")):
+    """Verify the session, raising 401 for an unknown or expired session_id"""
+    now = time.monotonic()
+    with _session_cache_lock:
+        cached = _session_cache.get(session_id)
+        if cached and now - cached[0] < SESSION_CACHE_TTL_SECONDS:
+            return cached[1]
+    
+    session = get_auth_manager().validate_session(session_id)
+    if not session.get("valid"):
+        raise HTTPException(status_code=401, detail="Invalid or expired session")
+    
+    # Only valid sessions are cached, so a fresh login is never masked by a stale miss
+    with _session_cache_lock:
+        _session_cache.pop(session_id, None)
+        _session_cache[session_id] = (now, session)
+        while len(_session_cache) > SESSION_CACHE_MAX_ENTRIES:
+            _session_cache.popitem(last=False)
+    
+    return session
+
+def invalidate_session(session_id: str):
+    """Drop a session from the cache (on logout) so it stops authenticating immediately"""
+    with _session_cache_lock:
+        _session_cache.pop(session_id, None)
@@ -7,7 +7,7 @@ from fastapi import FastAPI, File, UploadFile, HTTPException, Depends, status, R
 import os
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.responses import JSONResponse, FileResponse, HTMLResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, FileResponse, HTMLResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
@@ -15,6 +15,9 @@ from typing import Optional, List, Dict, Any
 import sys
 import json
 import asyncio
+import hashlib
+import time
+from collections import OrderedDict
 
 # Add parent directory to path for imports  
 sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database_config'))
@@ -24,6 +27,8 @@ import numpy as np
 from datetime import datetime
 import threading
 import uuid
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import threading as _threading
 
@@ -39,6 +44,30 @@ except Exception as _apex:
     APSCHEDULER_AVAILABLE = False
     print(f"⚠️ APScheduler not available: {_apex}")
 
+# Faster JSON encoding for stored raw_data and API responses when orjson is installed
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Optional Redis mirror of job status shared by all workers (enabled via REDIS_URL)
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+# Excel reader engine: calamine when installed and supported by this pandas
+from database_config.excel_engine import EXCEL_ENGINE
+
+# Stream the processed-data download with xlsxwriter's constant-memory writer when installed
+try:
+    import xlsxwriter
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    XLSXWRITER_AVAILABLE = False
+
 # Add parent directory to path for imports
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
@@ -49,10 +78,18 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Import existing functionality  
-from auth.user_auth import UserAuthenticator
-from database_config.db_utils import get_database_connection, check_database_requirements
+from auth.user_auth import get_auth_manager
+from database_config.db_utils import get_database_connection, check_database_requirements, get_shared_engine
 from database_config.file_upload_processor import FileUploadProcessor
 from database_config.config_loader import get_scheduler_interval, is_single_job_per_user_enabled
+from database_config.postgresql_config import PostgreSQLConfig
+import psycopg2
+import io
+import base64
+import tempfile
+
+# Database settings are read from the environment/.env once and shared by all handlers
+_DB_CONFIG = PostgreSQLConfig()
 
 # MVC controllers disabled for now to fix import issues
 MVC_CONTROLLERS_AVAILABLE = False
@@ -60,12 +97,14 @@ MVC_CONTROLLERS_AVAILABLE = False
 app = FastAPI(
     title="Company Data Scraper API",
     description="REST API for file upload and data processing",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse if ORJSON_AVAILABLE else JSONResponse
 )
 
 # Include MVC routers if available
 if MVC_CONTROLLERS_AVAILABLE:
     from backend_api.controllers import company_data_router, file_data_router
+    from backend_api.controllers.session_dependency import invalidate_session as invalidate_controller_session
     app.include_router(company_data_router)
     app.include_router(file_data_router)
     logger.info("✅ MVC controllers registered successfully")
@@ -109,6 +148,8 @@ app.add_middleware(
         "access-control-allow-methods",
         "access-control-allow-origin"
     ],
+    # Let browsers cache preflight results for a day (Chromium caps this at 2 hours)
+    max_age=86400,
 )
 
 # Log CORS configuration for debugging
@@ -190,8 +231,7 @@ async def debug_pending_uploads():
         ORDER BY upload_date DESC
         """
 
-        from database_config.postgresql_config import PostgreSQLConfig
-        db_config = PostgreSQLConfig()
+        db_config = _DB_CONFIG
         all_uploads = db_config.query_to_dataframe(all_uploads_query)
         
         # Get pending uploads specifically
@@ -206,10 +246,169 @@ async def debug_pending_uploads():
     except Exception as e:
         return {"error": str(e)}
 
+@contextmanager
+def _pg_connection():
+    """Borrow a raw psycopg2 connection from the process-wide db_utils engine pool
+    
+    Commits on success, rolls back on error. This is blocking work: call it from
+    a worker thread (run_in_executor), not directly in an async handler.
+    """
+    connection = get_shared_engine(_DB_CONFIG).raw_connection()
+    try:
+        yield connection
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        # Returns the connection to the pool; ones broken by a disconnect are discarded
+        connection.close()
+
+def _pg_fetchall(query: str, params: tuple = None) -> list:
+    """Run a query on a pooled connection and return all rows (blocking)"""
+    with _pg_connection() as connection, connection.cursor() as cursor:
+        cursor.execute(query, params)
+        return cursor.fetchall()
+
 # Global variables
-auth_system = UserAuthenticator()
-active_sessions = {}  # Store active user sessions
-processing_jobs = {}  # Store background processing jobs
+auth_system = get_auth_manager()
+# Store active user sessions: session_id -> (expires_at, last_touched, session_data).
+# Every entry gets the same fixed TTL, so insertion order is also expiry order.
+SESSION_TTL_SECONDS = 24 * 3600
+SESSION_CACHE_MAX_ENTRIES = 10000
+SESSION_TOUCH_INTERVAL_SECONDS = 300  # min gap between last_accessed writes per session
+active_sessions = OrderedDict()
+_active_sessions_lock = threading.Lock()
+
+def _cache_session(session_id: str, session_data: dict):
+    """Add or refresh an in-memory session with a new TTL"""
+    now = time.monotonic()
+    with _active_sessions_lock:
+        active_sessions.pop(session_id, None)
+        active_sessions[session_id] = (now + SESSION_TTL_SECONDS, now, session_data)
+        while len(active_sessions) > SESSION_CACHE_MAX_ENTRIES:
+            active_sessions.popitem(last=False)
+
+def _get_cached_session(session_id: str):
+    """Return (session_data, needs_touch) for a live in-memory session, or (None, False)"""
+    now = time.monotonic()
+    with _active_sessions_lock:
+        # Expired entries are always at the front
+        while active_sessions:
+            expires_at = next(iter(active_sessions.values()))[0]
+            if expires_at > now:
+                break
+            active_sessions.popitem(last=False)
+        
+        entry = active_sessions.get(session_id)
+        if entry is None:
+            return None, False
+        
+        expires_at, last_touched, session_data = entry
+        needs_touch = now - last_touched >= SESSION_TOUCH_INTERVAL_SECONDS
+        if needs_touch:
+            # Reassigning an existing key keeps its position (and expiry order)
+            active_sessions[session_id] = (expires_at, now, session_data)
+        return session_data, needs_touch
+
+# Job status fields mirrored to Redis so status polls work on any worker and after restarts
+JOB_STATUS_FIELDS = ("filename", "status", "progress", "message", "db_file_id")
+JOB_STATUS_TTL_SECONDS = 24 * 3600
+# Most job records (with their in-memory results) kept per process
+JOB_STORE_MAX_JOBS = int(os.getenv('JOB_STORE_MAX_JOBS', '1024'))
+
+class JobStore:
+    """Background processing jobs keyed by file_id
+    
+    Full records (including results) live in this process; when a Redis client
+    is given, every write also mirrors the status fields to a "job:<file_id>"
+    hash with a TTL, so get() can answer for jobs owned by another worker or
+    started before a restart.
+    
+    At most max_jobs records are kept: storing a new one evicts the least
+    recently stored jobs that are not still processing, so finished results
+    (which hold the output workbook) cannot accumulate for the life of the server.
+    """
+    
+    def __init__(self, redis_client=None, ttl_seconds: int = JOB_STATUS_TTL_SECONDS,
+                 max_jobs: int = JOB_STORE_MAX_JOBS):
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = redis_client
+        self._ttl_seconds = ttl_seconds
+        self._max_jobs = max_jobs
+    
+    def set(self, file_id: str, job: Dict[str, Any]):
+        """Store a new job record (metadata and results, never file content)"""
+        with self._lock:
+            self._jobs[file_id] = job
+            self._jobs.move_to_end(file_id)
+            self._evict()
+        self._publish(file_id, job)
+    
+    def update(self, file_id: str, **fields):
+        """Merge fields into an existing job record"""
+        with self._lock:
+            job = self._jobs.get(file_id)
+            if job is None:
+                return
+            job.update(fields)
+        self._publish(file_id, job)
+    
+    def get(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """Return the local job record, else the status published by any worker, else None"""
+        with self._lock:
+            job = self._jobs.get(file_id)
+        if job is not None or self._redis is None:
+            return job
+        try:
+            job = self._redis.hgetall(f"job:{file_id}")
+        except Exception as e:
+            logger.warning(f"⚠️ Redis job status lookup failed for {file_id}: {e}")
+            return None
+        if not job:
+            return None
+        job["progress"] = int(float(job.get("progress") or 0))
+        return job
+    
+    def items(self) -> List[tuple]:
+        """Snapshot of this process's (file_id, job) pairs"""
+        with self._lock:
+            return list(self._jobs.items())
+    
+    def _evict(self):
+        """Drop the oldest non-processing jobs while over max_jobs (caller holds the lock)"""
+        excess = len(self._jobs) - self._max_jobs
+        if excess <= 0:
+            return
+        stale = [
+            file_id for file_id, job in self._jobs.items()
+            if job.get("status") != "processing"
+        ][:excess]
+        for file_id in stale:
+            del self._jobs[file_id]
+    
+    def _publish(self, file_id: str, job: Dict[str, Any]):
+        """Copy a job's status fields to Redis (no-op without a client)"""
+        if self._redis is None:
+            return
+        fields = {field: str(job[field]) for field in JOB_STATUS_FIELDS if job.get(field) is not None}
+        try:
+            pipe = self._redis.pipeline()
+            pipe.hset(f"job:{file_id}", mapping=fields)
+            pipe.expire(f"job:{file_id}", self._ttl_seconds)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"⚠️ Redis job status update failed for {file_id}: {e}")
+
+_job_redis = None
+if REDIS_AVAILABLE and os.getenv("REDIS_URL"):
+    try:
+        _job_redis = redis.Redis.from_url(os.getenv("REDIS_URL"), decode_responses=True)
+    except Exception as _redis_err:
+        logger.warning(f"⚠️ Redis job store unavailable, using process memory only: {_redis_err}")
+
+job_store = JobStore(_job_redis)  # Background processing jobs
 
 # Scheduler globals
 scheduler = None
@@ -239,11 +438,6 @@ def _ensure_scheduler():
 
 def _process_pending_uploads(use_advisory_lock: bool = True):
     """Job: process pending uploads in file_upload table (no overlap)."""
-    # Prevent overlapping runs at the function level as well
-    if getattr(_process_pending_uploads, "_busy", False):
-        logger.info("⏳ Skipping run; previous job still in progress")
-        return
-    setattr(_process_pending_uploads, "_busy", True)
     advisory_conn = None
     advisory_acquired = False
     ADVISORY_LOCK_ID = 4242424242  # arbitrary 64-bit integer lock id
@@ -251,13 +445,10 @@ def _process_pending_uploads(use_advisory_lock: bool = True):
     if use_advisory_lock:
         # Try to acquire a cross-process advisory lock in Postgres so multiple
         # application instances won't run the job concurrently. If acquiring
-        # the lock fails due to DB errors, we proceed but rely on the in-process
-        # _busy flag to prevent overlap within this process.
+        # the lock fails due to DB errors, we proceed; uploads are claimed with
+        # FOR UPDATE SKIP LOCKED, so overlapping runs never share a row.
         try:
-            from database_config.postgresql_config import PostgreSQLConfig
-            import psycopg2
-
-            db_conf = PostgreSQLConfig()
+            db_conf = _DB_CONFIG
             params = db_conf.get_connection_params()
             advisory_conn = psycopg2.connect(**params)
             advisory_conn.autocommit = True
@@ -268,7 +459,6 @@ def _process_pending_uploads(use_advisory_lock: bool = True):
 
             if not advisory_acquired:
                 logger.info("🔒 Advisory lock held by another process; skipping this run")
-                setattr(_process_pending_uploads, "_busy", False)
                 try:
                     if advisory_conn:
                         advisory_conn.close()
@@ -296,9 +486,7 @@ def _process_pending_uploads(use_advisory_lock: bool = True):
             else:
                 # Open a short-lived connection to inspect DB state
                 try:
-                    from database_config.postgresql_config import PostgreSQLConfig
-                    import psycopg2
-                    db_conf = PostgreSQLConfig()
+                    db_conf = _DB_CONFIG
                     params = db_conf.get_connection_params()
                     with psycopg2.connect(**params) as _tmp_conn:
                         with _tmp_conn.cursor() as _c:
@@ -309,7 +497,6 @@ def _process_pending_uploads(use_advisory_lock: bool = True):
 
             if processing_count and processing_count > 0:
                 logger.info(f"🔁 Detected {processing_count} records already marked 'processing' in DB; skipping this automated run to avoid conflicts")
-                setattr(_process_pending_uploads, "_busy", False)
                 try:
                     if advisory_conn:
                         advisory_conn.close()
@@ -323,13 +510,19 @@ def _process_pending_uploads(use_advisory_lock: bool = True):
         # Use existing FileUploadProcessor from database_config
         processor = FileUploadProcessor()
 
-        # Get pending uploads with single job per user logic
+        # Get pending uploads with single job per user logic; the batch is claimed
+        # atomically (FOR UPDATE SKIP LOCKED) right here in both modes
+        single_job_per_user = is_single_job_per_user_enabled()
         try:
-            if is_single_job_per_user_enabled():
-                pending_df = processor.get_pending_uploads_by_user_queue()
+            if single_job_per_user:
+                # Claim exactly the one-per-user picks, so a user's files never run side by side
+                queued_df = processor.get_pending_uploads_by_user_queue()
+                pending_df = queued_df
+                if queued_df is not None and not queued_df.empty:
+                    pending_df = processor.claim_pending_uploads(file_ids=queued_df['id'].tolist())
                 logger.info("🔒 Using single job per user processing")
             else:
-                pending_df = processor.get_pending_uploads()
+                pending_df = processor.claim_pending_uploads(batch_size=50)
                 logger.info("🔓 Using multi-job processing")
         except Exception as e:
             logger.error(f"Failed to fetch pending uploads: {e}")
@@ -347,9 +540,8 @@ def _process_pending_uploads(use_advisory_lock: bool = True):
         logger.info(f"📋 Found {len(pending_df)} eligible job(s) for processing")
         # Prefer the consolidated automated runner which encapsulates the manual scrapers
         try:
-            from backend_api.automated_job.run_automated_jobs import run_once as automated_run_once
-            # Limit the runner to the number of pending rows discovered
-            result = automated_run_once(limit=len(pending_df))
+            from backend_api.automated_job.run_automated_jobs import run_claimed
+            result = run_claimed(pending_df['id'].tolist())
             success_count = int(result.get('successful', 0))
             failure_count = int(result.get('failed', 0))
             total = int(result.get('processed', success_count + failure_count))
@@ -363,6 +555,10 @@ def _process_pending_uploads(use_advisory_lock: bool = True):
             }
         except Exception as e:
             logger.error(f"❌ Automated runner failed: {e}")
+            # The claimed rows are already 'processing'; put unfinished ones back in the
+            # queue, otherwise the processing_count guard above skips every later run
+            released = processor.release_claimed_uploads(pending_df['id'].tolist())
+            logger.warning(f"↩️ Released {released} claimed upload(s) back to 'pending'")
             scheduler_state["last_error"] = str(e)
             scheduler_state["last_run"] = datetime.now().isoformat()
             scheduler_state["last_result"] = {"success": False, "processed": 0, "error": str(e)}
@@ -376,12 +572,16 @@ def _process_pending_uploads(use_advisory_lock: bool = True):
         except Exception as _unlock_err:
             logger.warning(f"⚠️ Failed to release advisory lock: {_unlock_err}")
 
-        setattr(_process_pending_uploads, "_busy", False)
         scheduler_state["running"] = False
 
+def _json_dumps(obj) -> str:
+    """Serialize obj to a JSON string, with orjson when available; unknown types become str"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(obj, default=str)
+
 def _clean_for_json_serialization(obj):
     """Clean data to ensure it can be JSON serialized without encoding errors"""
-    import numpy as np
     if isinstance(obj, dict):
         return {k: _clean_for_json_serialization(v) for k, v in obj.items()}
     elif isinstance(obj, list):
@@ -410,6 +610,15 @@ def _clean_for_json_serialization(obj):
     else:
         return str(obj)
 
+def _clean_result_for_status(result):
+    """Status-payload form of a processing result: JSON-safe, without the workbook stream"""
+    if not result:
+        return result
+    # The workbook itself is served by the download endpoint, not the status payload
+    result = {k: v for k, v in result.items() if k != "output_stream"}
+    # Convert any bytes or non-UTF-8 strings to safe UTF-8 strings
+    return _clean_for_json_serialization(result)
+
 # Pydantic models
 class LoginRequest(BaseModel):
     username: str
@@ -454,6 +663,19 @@ class UploadedFilesResponse(BaseModel):
     files: List[UploadedFile]
     count: int
 
+def _store_login_session(username: str, session_id: str):
+    """Persist a new API session in user_sessions (blocking)"""
+    with _pg_connection() as connection, connection.cursor() as cursor:
+        # Find the user ID and store the session in one statement
+        cursor.execute("""
+            INSERT INTO user_sessions (user_id, session_token, created_at, expires_at)
+            VALUES ((SELECT id FROM users WHERE username = %s), %s, NOW(), NOW() + INTERVAL '24 hours')
+            ON CONFLICT (session_token) 
+            DO UPDATE SET 
+                expires_at = EXCLUDED.expires_at,
+                last_accessed = NOW()
+        """, (username, session_id))
+
 # Authentication endpoints
 @app.post("/api/auth/login")
 async def login(request: LoginRequest, req: Request):
@@ -462,7 +684,11 @@ async def login(request: LoginRequest, req: Request):
         # Get client IP address
         client_ip = req.client.host if req.client else "unknown"
         
-        result = auth_system.authenticate_user(request.username, request.password, client_ip)
+        # bcrypt and the user lookup block, so authenticate off the event loop
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            None, auth_system.authenticate_user, request.username, request.password, client_ip
+        )
         
         if result['success']:
             session_id = str(uuid.uuid4())
@@ -473,40 +699,15 @@ async def login(request: LoginRequest, req: Request):
             }
             
             # Store in memory
-            active_sessions[session_id] = session_data
+            _cache_session(session_id, session_data)
             
             # Also store in database for persistence
             try:
-                from database_config.postgresql_config import PostgreSQLConfig
-                import psycopg2
-                import json
-                
-                db_config = PostgreSQLConfig()
-                connection_params = db_config.get_connection_params()
-                connection = psycopg2.connect(**connection_params)
-                cursor = connection.cursor()
-                
                 # Get user ID for the session
                 user_info = session_data.get('user_info', {})
                 username = user_info.get('username', 'unknown')
                 
-                # Find user ID
-                cursor.execute("SELECT id FROM users WHERE username = %s", (username,))
-                user_result = cursor.fetchone()
-                user_id = user_result[0] if user_result else None
-                
-                cursor.execute("""
-                    INSERT INTO user_sessions (user_id, session_token, created_at, expires_at)
-                    VALUES (%s, %s, NOW(), NOW() + INTERVAL '24 hours')
-                    ON CONFLICT (session_token) 
-                    DO UPDATE SET 
-                        expires_at = EXCLUDED.expires_at,
-                        last_accessed = NOW()
-                """, (user_id, session_id))
-                
-                connection.commit()
-                cursor.close()
-                connection.close()
+                await loop.run_in_executor(None, _store_login_session, username, session_id)
                 
                 print(f"✅ Session stored in database: {session_id}")
                 
@@ -555,8 +756,12 @@ async def register(request: RegisterRequest):
 @app.post("/api/auth/logout")
 async def logout(session_id: str):
     """Logout endpoint"""
-    if session_id in active_sessions:
-        del active_sessions[session_id]
+    with _active_sessions_lock:
+        active_sessions.pop(session_id, None)
+    # End the authenticator's session too, and drop the controllers' cached copy
+    auth_system.logout(session_id)
+    if MVC_CONTROLLERS_AVAILABLE:
+        invalidate_controller_session(session_id)
     
     return {"success": True, "message": "Logged out successfully"}
 
@@ -566,7 +771,7 @@ async def get_users(session_id: str):
     """Get all users - admin only"""
     try:
         # Verify session
-        user_info = verify_session(session_id)
+        user_info = await verify_session(session_id)
         if not user_info:
             raise HTTPException(status_code=401, detail="Invalid session")
         
@@ -575,10 +780,7 @@ async def get_users(session_id: str):
         #     raise HTTPException(status_code=403, detail="Admin access required")
         
         # Get users from database using PostgreSQL connection
-        from database_config.postgresql_config import PostgreSQLConfig
-        import psycopg2
-
-        db_config = PostgreSQLConfig()
+        db_config = _DB_CONFIG
         connection_params = db_config.get_connection_params()
         connection = psycopg2.connect(**connection_params)
 
@@ -625,16 +827,12 @@ async def create_user(user_data: dict, session_id: str):
     """Create new user - admin only"""
     try:
         # Verify session
-        user_info = verify_session(session_id)
+        user_info = await verify_session(session_id)
         if not user_info:
             raise HTTPException(status_code=401, detail="Invalid session")
         
-        # Create user using existing auth system
-        from auth.user_auth import UserAuthenticator
-        auth = UserAuthenticator()
-        
-        # Register the new user
-        result = auth.register_user(
+        # Register the new user using the shared auth system
+        result = auth_system.register_user(
             username=user_data.get('username'),
             password=user_data.get('password'),
             email=user_data.get('email')
@@ -642,10 +840,7 @@ async def create_user(user_data: dict, session_id: str):
         
         if result['success']:
             # Update role and status fields if specified
-            from database_config.postgresql_config import PostgreSQLConfig
-            import psycopg2
-
-            db_config = PostgreSQLConfig()
+            db_config = _DB_CONFIG
             connection_params = db_config.get_connection_params()
             connection = psycopg2.connect(**connection_params)
             
@@ -689,15 +884,12 @@ async def update_user(user_data: dict, session_id: str):
     """Update user information"""
     try:
         # Verify session
-        user_info = verify_session(session_id)
+        user_info = await verify_session(session_id)
         if not user_info:
             raise HTTPException(status_code=401, detail="Invalid session")
         
         # Get connection and update user using PostgreSQL connection
-        from database_config.postgresql_config import PostgreSQLConfig
-        import psycopg2
-
-        db_config = PostgreSQLConfig()
+        db_config = _DB_CONFIG
         connection_params = db_config.get_connection_params()
         connection = psycopg2.connect(**connection_params)
         
@@ -747,15 +939,12 @@ async def delete_user(user_id: str, session_id: str):
     """Delete user"""
     try:
         # Verify session
-        user_info = verify_session(session_id)
+        user_info = await verify_session(session_id)
         if not user_info:
             raise HTTPException(status_code=401, detail="Invalid session")
         
         # Prevent self-deletion using PostgreSQL connection
-        from database_config.postgresql_config import PostgreSQLConfig
-        import psycopg2
-
-        db_config = PostgreSQLConfig()
+        db_config = _DB_CONFIG
         connection_params = db_config.get_connection_params()
         connection = psycopg2.connect(**connection_params)
         
@@ -790,88 +979,83 @@ async def delete_user(user_id: str, session_id: str):
 @app.get("/api/debug/sessions")
 async def debug_sessions():
     """Debug endpoint to check active sessions"""
+    with _active_sessions_lock:
+        session_ids = list(active_sessions.keys())
     return {
-        "active_sessions": list(active_sessions.keys()),
-        "session_count": len(active_sessions)
+        "active_sessions": session_ids,
+        "session_count": len(session_ids)
+    }
+
+def _load_persisted_session(session_id: str):
+    """Extend an unexpired user_sessions row and return its session data, or None (blocking)"""
+    with _pg_connection() as connection, connection.cursor() as cursor:
+        # Extend the session if it exists and is still valid, returning its user in the same statement
+        cursor.execute("""
+            UPDATE user_sessions us
+            SET expires_at = NOW() + INTERVAL '24 hours',
+                last_accessed = NOW()
+            FROM users u
+            WHERE u.id = us.user_id
+            AND us.session_token = %s 
+            AND us.expires_at > NOW()
+            RETURNING us.user_id, us.created_at, u.username, u.email, u.role, us.expires_at
+        """, (session_id,))
+        
+        result = cursor.fetchone()
+    
+    if not result:
+        return None
+    
+    user_id, created_at, username, email, role, expires_at = result
+    return {
+        'user_info': {
+            'id': user_id,
+            'username': username,
+            'email': email,
+            'role': role
+        },
+        'session_token': session_id,
+        'login_time': created_at.isoformat(),
+        'expires_at': expires_at.isoformat() if expires_at else None
     }
 
 # Helper function to verify session
-def verify_session(session_id: str):
-    """Verify active session - enhanced with better persistence and error handling"""
+async def verify_session(session_id: str):
+    """Verify active session - enhanced with better persistence and error handling
+    
+    The in-memory cache is checked on the event loop; database work (the
+    last_accessed touch and the persisted-session fallback) runs in the executor.
+    """
     logger.debug(f"Verifying session_id: {session_id}")
-    logger.debug(f"Active sessions in memory: {list(active_sessions.keys())}")
+    logger.debug(f"Active sessions in memory: {len(active_sessions)}")
     
     if not session_id or session_id.strip() == "":
         logger.warning("Empty session_id provided")
         return None
     
+    loop = asyncio.get_running_loop()
+    
     # First check memory (fast path)
-    if session_id in active_sessions:
-        session_data = active_sessions[session_id]
-        # Update last accessed time in database
-        try:
-            _update_session_last_accessed(session_id)
-        except Exception as e:
-            logger.warning(f"Could not update session last accessed: {e}")
+    session_data, needs_touch = _get_cached_session(session_id)
+    if session_data is not None:
+        # Update last accessed time in database (at most once per touch interval);
+        # fire-and-forget, _update_session_last_accessed handles its own errors
+        if needs_touch:
+            loop.run_in_executor(None, _update_session_last_accessed, session_id)
         return session_data
     
     # If not in memory, check database (persistent sessions)
     try:
-        from database_config.postgresql_config import PostgreSQLConfig
-        import psycopg2
-        
-        db_config = PostgreSQLConfig()
-        connection_params = db_config.get_connection_params()
-        connection = psycopg2.connect(**connection_params)
-        cursor = connection.cursor()
-        
-        # Check if session exists and is valid (extended expiry time)
-        cursor.execute("""
-            SELECT us.user_id, us.created_at, u.username, u.email, u.role,
-                   us.expires_at, us.last_accessed
-            FROM user_sessions us
-            JOIN users u ON us.user_id = u.id
-            WHERE us.session_token = %s 
-            AND us.expires_at > NOW()
-        """, (session_id,))
+        session_data = await loop.run_in_executor(None, _load_persisted_session, session_id)
         
-        result = cursor.fetchone()
-        
-        if result:
-            user_id, created_at, username, email, role, expires_at, last_accessed = result
-            
-            # Extend session if it's been accessed recently
-            cursor.execute("""
-                UPDATE user_sessions 
-                SET expires_at = NOW() + INTERVAL '24 hours',
-                    last_accessed = NOW()
-                WHERE session_token = %s
-            """, (session_id,))
-            connection.commit()
-            
-            session_data = {
-                'user_info': {
-                    'id': user_id,
-                    'username': username,
-                    'email': email,
-                    'role': role
-                },
-                'session_token': session_id,
-                'login_time': created_at.isoformat(),
-                'expires_at': expires_at.isoformat() if expires_at else None
-            }
-            
+        if session_data:
             # Restore session to memory with extended expiry
-            active_sessions[session_id] = session_data
-            logger.info(f"✅ Session restored from database: {session_id} for user: {username}")
+            _cache_session(session_id, session_data)
+            logger.info(f"✅ Session restored from database: {session_id} for user: {session_data['user_info']['username']}")
             
-            cursor.close()
-            connection.close()
             return session_data
         else:
             logger.warning(f"❌ Session not found or expired in database: {session_id}")
-            cursor.close()
-            connection.close()
             return None
             
     except Exception as e:
@@ -883,22 +1067,12 @@ def verify_session(session_id: str):
 def _update_session_last_accessed(session_id: str):
     """Update session last accessed time"""
     try:
-        from database_config.postgresql_config import PostgreSQLConfig
-        import psycopg2
-        
-        db_config = PostgreSQLConfig()
-        connection_params = db_config.get_connection_params()
-        connection = psycopg2.connect(**connection_params)
-        cursor = connection.cursor()
-        
-        cursor.execute("""
-            UPDATE user_sessions 
-            SET last_accessed = NOW()
-            WHERE session_token = %s
-        """, (session_id,))
-        connection.commit()
-        cursor.close()
-        connection.close()
+        with _pg_connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                UPDATE user_sessions 
+                SET last_accessed = NOW()
+                WHERE session_token = %s
+            """, (session_id,))
         
     except Exception as e:
         logger.debug(f"Session update error: {e}")
@@ -942,6 +1116,136 @@ async def cleanup_stale_jobs():
 
 ## Remove duplicate cleanup_scheduler and startup_event logic
 
+def _find_existing_upload(file_hash: str, username: str):
+    """Return (id, columns, sample_rows, row_count) of this user's stored upload with the same content, or None"""
+    try:
+        with _pg_connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT id, raw_data->'columns', raw_data->'data', records_count
+                FROM file_upload
+                WHERE file_hash = %s AND uploaded_by = %s
+                  AND processing_status IN ('uploaded', 'completed')
+                ORDER BY upload_date DESC
+                LIMIT 1
+            """, (file_hash, username))
+            row = cursor.fetchone()
+    except Exception as e:
+        logger.warning(f"⚠️ Duplicate upload lookup failed: {e}")
+        return None
+    
+    if not row:
+        return None
+    db_file_id, columns, sample_records, records_count = row
+    return db_file_id, columns or [], sample_records or [], int(records_count or 0)
+
+UPLOAD_HASH_CHUNK_SIZE = 1024 * 1024
+
+# Largest upload accepted by the API, in bytes
+MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_BYTES', str(50 * 1024 * 1024)))
+UPLOAD_READ_CHUNK_SIZE = 64 * 1024
+
+def _upload_too_large() -> HTTPException:
+    """413 error for uploads over MAX_UPLOAD_BYTES"""
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File too large (maximum {MAX_UPLOAD_BYTES // (1024 * 1024)} MB)"
+    )
+
+async def _read_upload_bounded(file: UploadFile) -> bytes:
+    """Read an uploaded file in chunks, rejecting it as soon as it exceeds MAX_UPLOAD_BYTES"""
+    chunks = []
+    total = 0
+    while True:
+        chunk = await file.read(UPLOAD_READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > MAX_UPLOAD_BYTES:
+            raise _upload_too_large()
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+def _hash_upload(fileobj) -> tuple:
+    """Return (sha256 hexdigest, size in bytes) of a file object, read in chunks"""
+    digest = hashlib.sha256()
+    size = 0
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(UPLOAD_HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+        size += len(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest(), size
+
+def _build_upload_preview(fileobj, filename: str):
+    """Parse an uploaded Excel file and build its preview data"""
+    fileobj.seek(0)
+    df = pd.read_excel(fileobj, engine=EXCEL_ENGINE)
+    
+    # Clean the sample rows for JSON serialization in one vectorized pass:
+    # ISO datetimes, NaN/NaT/inf -> None, numpy scalars -> Python scalars
+    head = df.head(5).rename(columns=str)
+    for col in head.select_dtypes(include=["datetime", "datetimetz"]).columns:
+        head[col] = head[col].dt.strftime("%Y-%m-%dT%H:%M:%S")
+    head = head.replace([np.inf, -np.inf], np.nan)
+    sample_records = head.astype(object).where(head.notna(), None).to_dict(orient="records")
+    
+    # Column names are stringified once and shared by the preview and the database record
+    column_names = df.columns.astype(str).tolist()
+    preview_data = {
+        "filename": filename,
+        "rows": len(df),
+        "columns": len(column_names),
+        "column_names": column_names,
+        "sample_data": sample_records
+    }
+    return preview_data
+
+def _store_upload(preview_data: Dict[str, Any], file_size: int,
+                  filename: str, username: str, file_hash: str) -> Optional[int]:
+    """Insert the upload into file_upload; returns the new id, or None if the save failed"""
+    try:
+        # Prepare data for database insertion
+        column_names = preview_data["column_names"]
+        raw_data = {
+            "columns": column_names,
+            "data": preview_data["sample_data"][:100],  # Store first 100 records as sample
+            "metadata": {
+                "total_rows": preview_data["rows"],
+                "total_columns": preview_data["columns"],
+                "upload_timestamp": datetime.now().isoformat(),
+                "file_extension": os.path.splitext(filename)[1].lower()
+            }
+        }
+        
+        # Insert file record
+        with _pg_connection() as connection, connection.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO file_upload 
+                (file_name, file_path, file_size, original_columns, raw_data, 
+                 uploaded_by, processing_status, records_count, file_hash)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING id
+            """, (
+                filename,
+                "database_storage",  # No file path, stored in database
+                file_size,  # Size of the uploaded file in bytes
+                _json_dumps(column_names),
+                _json_dumps(raw_data),
+                username,
+                'uploaded',
+                preview_data["rows"],
+                file_hash  # Hash from content
+            ))
+            
+            db_file_id = cursor.fetchone()[0]
+        
+        print(f"✅ File saved to database with ID: {db_file_id}")
+        return db_file_id
+        
+    except Exception as db_error:
+        print(f"❌ Database save error: {str(db_error)}")
+        return None
+
 # File upload endpoints
 @app.post("/api/files/upload")
 async def upload_file(
@@ -951,7 +1255,7 @@ async def upload_file(
     """Upload Excel file for processing"""
     try:
         # Verify session
-        session = verify_session(session_id)
+        session = await verify_session(session_id)
         
         # Validate file type
         if not file.filename.endswith(('.xlsx', '.xls')):
@@ -960,117 +1264,60 @@ async def upload_file(
                 detail="Only Excel files (.xlsx, .xls) are supported"
             )
         
-        # Read file content directly into memory (NO local storage)
+        # The upload is consumed from Starlette's spooled temporary file in chunks
+        # (NO local storage of our own, and never held in memory as one bytes object)
         file_id = str(uuid.uuid4())
-        content = await file.read()
+        username = session['user_info'].get('username', 'API_User')
+        
+        loop = asyncio.get_running_loop()
+        file_hash, file_size = await loop.run_in_executor(None, _hash_upload, file.file)
+        if file_size > MAX_UPLOAD_BYTES:
+            raise _upload_too_large()
+        
+        # Identical re-uploads reuse the stored record instead of parsing and storing the file again
+        existing_upload = await loop.run_in_executor(None, _find_existing_upload, file_hash, username)
+        if existing_upload:
+            db_file_id, columns, sample_records, records_count = existing_upload
+            job_store.set(file_id, {
+                "filename": file.filename,
+                "user_info": session['user_info'],
+                "session_token": session['session_token'],
+                "status": "uploaded",
+                "progress": 0,
+                "message": "File already uploaded; using the existing database record",
+                "db_file_id": db_file_id
+            })
+            
+            return FileUploadResponse(
+                success=True,
+                message="File already uploaded",
+                file_id=file_id,
+                preview_data={
+                    "filename": file.filename,
+                    "rows": records_count,
+                    "columns": len(columns),
+                    "column_names": columns,
+                    "sample_data": sample_records[:5]
+                }
+            )
         
-        # Read and preview file directly from memory
+        # Parse and store on a worker thread so the event loop keeps serving other requests
         try:
-            import io
-            df = pd.read_excel(io.BytesIO(content))
-            
-            # Clean the data for JSON serialization with robust handling
-            def clean_value(value):
-                """Clean a single value for JSON serialization"""
-                if value is None:
-                    return None
-                elif pd.isna(value):
-                    return None
-                elif isinstance(value, (int, np.integer)):
-                    return int(value)
-                elif isinstance(value, (float, np.floating)):
-                    if np.isfinite(value):
-                        return float(value)
-                    else:
-                        return None
-                elif isinstance(value, str):
-                    return str(value)
-                elif hasattr(value, 'isoformat'):  # datetime objects
-                    return value.isoformat()
-                else:
-                    return str(value)
-            
-            # Get sample data with robust cleaning
-            sample_records = []
-            if len(df) > 0:
-                for _, row in df.head(5).iterrows():
-                    clean_record = {}
-                    for col in df.columns:
-                        clean_record[str(col)] = clean_value(row[col])
-                    sample_records.append(clean_record)
-            
-            preview_data = {
-                "filename": file.filename,
-                "rows": int(len(df)),
-                "columns": int(len(df.columns)),
-                "column_names": [str(col) for col in df.columns.tolist()],
-                "sample_data": sample_records
-            }
+            preview_data = await loop.run_in_executor(None, _build_upload_preview, file.file, file.filename)
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Error reading Excel file: {str(e)}"
             )
         
-        # Save file to database directly
-        db_file_id = None
-        try:
-            from database_config.postgresql_config import PostgreSQLConfig
-            import psycopg2
-            import json
-            
-            db_config = PostgreSQLConfig()
-            connection_params = db_config.get_connection_params()
-            connection = psycopg2.connect(**connection_params)
-            
-            cursor = connection.cursor()
-            
-            # Prepare data for database insertion
-            username = session['user_info'].get('username', 'API_User')
-            raw_data = {
-                "columns": [str(col) for col in df.columns.tolist()],
-                "data": sample_records[:100],  # Store first 100 records as sample
-                "metadata": {
-                    "total_rows": len(df),
-                    "total_columns": len(df.columns),
-                    "upload_timestamp": datetime.now().isoformat(),
-                    "file_extension": os.path.splitext(file.filename)[1].lower()
-                }
-            }
-            
-            # Insert file record
-            cursor.execute("""
-                INSERT INTO file_upload 
-                (file_name, file_path, file_size, original_columns, raw_data, 
-                 uploaded_by, processing_status, records_count, file_hash)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING id
-            """, (
-                file.filename,
-                "database_storage",  # No file path, stored in database
-                len(content),  # File size from content length
-                json.dumps([str(col) for col in df.columns.tolist()]),
-                json.dumps(raw_data),
-                username,
-                'uploaded',
-                len(df),
-                str(hash(str(content) + str(datetime.now())))  # Hash from content
-            ))
-            
-            db_file_id = cursor.fetchone()[0]
-            connection.commit()
-            cursor.close()
-            connection.close()
-            
-            print(f"✅ File saved to database with ID: {db_file_id}")
-            
-        except Exception as db_error:
-            print(f"❌ Database save error: {str(db_error)}")
-            db_file_id = None
+        db_file_id = await loop.run_in_executor(
+            None, _store_upload, preview_data, file_size, file.filename, username, file_hash
+        )
         
         # Store file info for processing (NO local storage)
-        processing_jobs[file_id] = {
-            "file_content": content,  # Store content in memory instead of file path
+        # Only metadata is kept; the content is persisted in file_upload and
+        # processing reloads it from there
+        job_store.set(file_id, {
             "filename": file.filename,
             "user_info": session['user_info'],
             "session_token": session['session_token'],
@@ -1078,7 +1325,7 @@ async def upload_file(
             "progress": 0,
             "message": f"File uploaded successfully{' and saved to database' if db_file_id else ' (database save failed)'}",
             "db_file_id": db_file_id  # Link to database record
-        }
+        })
         
         return FileUploadResponse(
             success=True,
@@ -1094,37 +1341,43 @@ async def upload_file(
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
     
 
-@app.get("/api/files/status/{file_id}")
+@app.get("/api/files/status/{file_id}", response_model=ProcessingStatus)
 async def get_processing_status(file_id: str, session_id: str):
     """Get file processing status"""
     try:
         # Verify session
-        verify_session(session_id)
+        await verify_session(session_id)
         
-        if file_id not in processing_jobs:
+        # Jobs started by another worker (or before a restart) are found in Redis
+        job = job_store.get(file_id)
+        if job is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="File not found"
             )
         
-        job = processing_jobs[file_id]
-        
-        # Clean the result data to ensure UTF-8 compatibility
-        result_data = job.get("result")
-        if result_data:
-            # Convert any bytes or non-UTF-8 strings to safe UTF-8 strings
-            result_data = _clean_for_json_serialization(result_data)
+        # Clean the result data to ensure UTF-8 compatibility; completed jobs carry
+        # a copy cleaned once when the result was stored
+        if "cleaned_result" in job:
+            result_data = job["cleaned_result"]
+        else:
+            result_data = _clean_result_for_status(job.get("result"))
         
         # Also clean the message field
         message = _clean_for_json_serialization(job["message"])
         
-        return ProcessingStatus(
-            job_id=file_id,
-            status=job["status"],
-            progress=job["progress"],
-            message=message,
-            result=result_data
-        )
+        payload = {
+            "job_id": file_id,
+            "status": job["status"],
+            "progress": job["progress"],
+            "message": message,
+            "result": result_data
+        }
+        # This endpoint is polled continuously: the payload is already JSON-safe, so
+        # serialize it with orjson directly instead of re-validating it through the model
+        if ORJSON_AVAILABLE:
+            return ORJSONResponse(payload)
+        return ProcessingStatus(**payload)
         
     except HTTPException:
         raise
@@ -1140,16 +1393,15 @@ async def download_processed_file(file_id: str, session_id: str):
     from fastapi.responses import FileResponse
     try:
         # Verify session
-        verify_session(session_id)
+        await verify_session(session_id)
         
-        if file_id not in processing_jobs:
+        job = job_store.get(file_id)
+        if job is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="File not found"
             )
         
-        job = processing_jobs[file_id]
-        
         if job["status"] != "completed":
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -1157,20 +1409,26 @@ async def download_processed_file(file_id: str, session_id: str):
             )
         
         result = job.get("result", {})
-        output_content = result.get("output_content")
+        output_stream = result.get("output_stream")
         
-        if not output_content:
+        if output_stream is None:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Processed file content not found"
             )
         
-        # Return file content directly from memory (NO local files)
-        from fastapi.responses import Response
-        return Response(
-            content=output_content,
+        # Stream file content directly from memory (NO local files). The job's buffer
+        # may be downloaded more than once, so read through a view instead of seeking it.
+        from fastapi.responses import StreamingResponse
+        view = output_stream.getbuffer()
+        chunk_size = 64 * 1024
+        return StreamingResponse(
+            (bytes(view[i:i + chunk_size]) for i in range(0, len(view), chunk_size)),
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename={result.get('output_file', 'processed_file.xlsx')}"}
+            headers={
+                "Content-Disposition": f"attachment; filename={result.get('output_file', 'processed_file.xlsx')}",
+                "Content-Length": str(len(view))
+            }
         )
         
     except HTTPException:
@@ -1181,141 +1439,186 @@ async def download_processed_file(file_id: str, session_id: str):
             detail=f"Download error: {str(e)}"
         )
 
-@app.get("/api/files/download-processed/{file_id}")
-async def download_processed_file_with_linkedin(file_id: str, session_id: str):
-    """Download processed file with LinkedIn enrichment data in Excel format"""
+# Bounded pool for processed-data workbook builds, so large exports cannot take over
+# the default executor that upload parsing and other blocking calls share
+EXPORT_WORKERS = int(os.getenv('EXPORT_WORKERS', '4'))
+_EXPORT_EXECUTOR = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix='export')
+
+# company_data column -> header in the processed-data download, in sheet order
+PROCESSED_EXPORT_COLUMNS = (
+    ("company_name", "Company Name"),
+    ("linkedin_url", "LinkedIn_URL"),
+    ("company_website", "Website_URL"),
+    ("company_size", "Company_Size"),
+    ("industry", "Industry"),
+    ("revenue", "Revenue"),
+)
+PROCESSED_EXPORT_FETCH_SIZE = 2000
+# Finished workbooks up to this size stay in memory; larger ones spill to a temp file
+EXPORT_SPOOL_MAX_SIZE = 5 * 1024 * 1024
+EXPORT_STREAM_CHUNK_SIZE = 1024 * 1024
+
+def _build_processed_workbook(columns: List[str], rows, widths: List[float]):
+    """Render rows as a styled .xlsx workbook into a spooled temporary file
+    
+    rows may be any iterable (e.g. a server-side cursor); it is consumed once,
+    in order. xlsxwriter's constant_memory mode flushes each row as soon as the
+    next one starts; without it, openpyxl's write-only mode is used, which also
+    avoids keeping a Cell object per value.
+    """
+    excel_buffer = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_SIZE)
+    
+    if XLSXWRITER_AVAILABLE:
+        # Scraped text is written as plain strings: no auto-hyperlinks (capped at
+        # 65,530 per sheet) and no formulas from values starting with "="
+        wb = xlsxwriter.Workbook(excel_buffer, {
+            'constant_memory': True,
+            'strings_to_urls': False,
+            'strings_to_formulas': False
+        })
+        try:
+            ws = wb.add_worksheet("Processed Company Data")
+            header_format = wb.add_format({
+                'bold': True, 'font_color': '#FFFFFF', 'bg_color': '#366092',
+                'align': 'center', 'valign': 'vcenter'
+            })
+            for idx, width in enumerate(widths):
+                ws.set_column(idx, idx, width)
+            ws.write_row(0, 0, columns, header_format)
+            for row_idx, row in enumerate(rows, start=1):
+                ws.write_row(row_idx, 0, row)
+        finally:
+            wb.close()
+        excel_buffer.seek(0)
+        return excel_buffer
+    
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.utils import get_column_letter
+    from openpyxl.styles import Font, PatternFill, Alignment
+    
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Processed Company Data")
+    for idx, width in enumerate(widths, 1):
+        ws.column_dimensions[get_column_letter(idx)].width = width
+    
+    # Style the header row
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    header_alignment = Alignment(horizontal="center", vertical="center")
+    
+    header_cells = []
+    for column_name in columns:
+        cell = WriteOnlyCell(ws, value=column_name)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = header_alignment
+        header_cells.append(cell)
+    ws.append(header_cells)
+    
+    for row in rows:
+        ws.append(row)
+    
+    wb.save(excel_buffer)
+    excel_buffer.seek(0)
+    return excel_buffer
+
+def _iter_export_file(excel_buffer):
+    """Yield a finished workbook in EXPORT_STREAM_CHUNK_SIZE pieces, closing it afterwards"""
     try:
-        # Verify session
-        verify_session(session_id)
-        
-        # Get database connection
-        db_connection = get_database_connection("postgresql")
-        if not db_connection:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Database connection failed"
-            )
-        
-        # Ensure database connection is established
-        if not db_connection.connect():
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Failed to connect to database"
-            )
-        
-        # Connect to database
-        if not db_connection.connect():
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Failed to establish database connection"
+        excel_buffer.seek(0)
+        while True:
+            chunk = excel_buffer.read(EXPORT_STREAM_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        excel_buffer.close()
+
+def _build_processed_download(file_id: str):
+    """Query a file's processed company data and render it; returns (excel_buffer, filename)
+    
+    Runs on _EXPORT_EXECUTOR: the query and workbook build are blocking work.
+    Rows are streamed from a server-side cursor straight into the workbook, so
+    the full result set is never held in memory.
+    """
+    source_columns = [column for column, _ in PROCESSED_EXPORT_COLUMNS]
+    headers = [header for _, header in PROCESSED_EXPORT_COLUMNS]
+    where_clause = "WHERE file_upload_id = %s AND processing_status = 'completed'"
+    
+    with _pg_connection() as connection:
+        # Row count and per-column display lengths in one aggregate pass, since
+        # widths must be set before the first row is written
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*), "
+                + ", ".join(f"COALESCE(MAX(LENGTH({column}::text)), 0)" for column in source_columns)
+                + f" FROM company_data {where_clause}",
+                (file_id,)
             )
+            row_count, *value_lengths = cursor.fetchone()
+            
+            if not row_count:
+                logger.warning(f"No processed data found for file_id: {file_id}")
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="No processed data found for this file"
+                )
+            logger.info(f"Found {row_count} processed records for file_id: {file_id}")
+            
+            # Get original filename for the processed file name (file_upload.file_name)
+            original_filename = "processed_data.xlsx"
+            cursor.execute("SELECT file_name FROM file_upload WHERE id = %s", (file_id,))
+            file_row = cursor.fetchone()
+            if file_row is None:
+                logger.warning(f"No file upload record found for file_id: {file_id}")
+            elif file_row[0] and isinstance(file_row[0], str):
+                original_filename = f"processed_{file_row[0].rsplit('.', 1)[0]}.xlsx"
+            else:
+                logger.warning(f"Original filename is None or invalid for file_id: {file_id}")
         
-        # Query processed company data with LinkedIn enrichment
-        query = f"""
-        SELECT 
-            company_name as "Company Name",
-            linkedin_url as "LinkedIn_URL",
-            company_website as "Website_URL", 
-            company_size as "Company_Size",
-            industry as "Industry",
-            revenue as "Revenue"
-        FROM company_data 
-        WHERE file_upload_id = '{file_id}' 
-        AND processing_status = 'completed'
-        ORDER BY company_name
-        """
-        
-        logger.info(f"Executing query for file_id: {file_id}")
-        result_df = db_connection.query_to_dataframe(query)
+        widths = [
+            min(max(int(length), len(header)) + 2, 50)
+            for length, header in zip(value_lengths, headers)
+        ]
         
-        if result_df is None or result_df.empty:
-            logger.warning(f"No processed data found for file_id: {file_id}")
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="No processed data found for this file"
+        # Query processed company data with LinkedIn enrichment through a named
+        # (server-side) cursor, fetched PROCESSED_EXPORT_FETCH_SIZE rows at a time
+        with connection.cursor(name=f"processed_export_{uuid.uuid4().hex}") as cursor:
+            cursor.itersize = PROCESSED_EXPORT_FETCH_SIZE
+            cursor.execute(
+                f"SELECT {', '.join(source_columns)} FROM company_data {where_clause} ORDER BY company_name",
+                (file_id,)
             )
+            excel_buffer = _build_processed_workbook(headers, cursor, widths)
+    
+    return excel_buffer, original_filename
+
+@app.get("/api/files/download-processed/{file_id}")
+async def download_processed_file_with_linkedin(file_id: str, session_id: str):
+    """Download processed file with LinkedIn enrichment data in Excel format"""
+    try:
+        # Verify session
+        await verify_session(session_id)
         
-        logger.info(f"Found {len(result_df)} processed records for file_id: {file_id}")
-        
-        # Create Excel file in memory
-        from io import BytesIO
-        import openpyxl
-        from openpyxl.utils.dataframe import dataframe_to_rows
-        from openpyxl.styles import Font, PatternFill, Alignment
-        
-        # Create workbook and worksheet
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Processed Company Data"
-        
-        # Add data to worksheet
-        for r in dataframe_to_rows(result_df, index=False, header=True):
-            ws.append(r)
-        
-        # Style the header row
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        header_alignment = Alignment(horizontal="center", vertical="center")
-        
-        for cell in ws[1]:
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-        
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
-        
-        # Save to BytesIO
-        excel_buffer = BytesIO()
-        wb.save(excel_buffer)
-        excel_buffer.seek(0)
+        # The query and workbook build are blocking; run them on the bounded export pool
+        loop = asyncio.get_running_loop()
+        excel_buffer, original_filename = await loop.run_in_executor(
+            _EXPORT_EXECUTOR, _build_processed_download, file_id
+        )
         
-        # Get original filename for the processed file name (file_upload.file_name)
-        try:
-            file_query = f"SELECT file_name FROM file_upload WHERE id = '{file_id}'"
-            file_result = db_connection.query_to_dataframe(file_query)
-            original_filename = "processed_data.xlsx"
-            if file_result is not None and not file_result.empty:
-                # prefer file_name column from file_upload
-                original_name = None
-                if 'file_name' in file_result.columns:
-                    original_name = file_result.iloc[0]['file_name']
-                elif 'original_filename' in file_result.columns:
-                    original_name = file_result.iloc[0]['original_filename']
-
-                if original_name and isinstance(original_name, str):
-                    name_parts = original_name.rsplit('.', 1)
-                    original_filename = f"processed_{name_parts[0]}.xlsx"
-                else:
-                    logger.warning(f"Original filename is None or invalid for file_id: {file_id}")
-            else:
-                logger.warning(f"No file upload record found for file_id: {file_id}")
-        except Exception as e:
-            logger.warning(f"Could not determine original filename for file_id {file_id}: {e}")
-
-        # Ensure buffer is at start and return a streaming response with correct headers
-        excel_buffer.seek(0)
+        # Stream the finished workbook in chunks; the generator closes (and so
+        # deletes) the spooled file once it has been sent
+        excel_buffer.seek(0, os.SEEK_END)
+        content_length = excel_buffer.tell()
         from fastapi.responses import StreamingResponse
         response = StreamingResponse(
-            content=excel_buffer,
+            content=_iter_export_file(excel_buffer),
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         )
         # Use Content-Disposition with quoted filename
         response.headers["Content-Disposition"] = f'attachment; filename="{original_filename}"'
-        try:
-            response.headers["Content-Length"] = str(len(excel_buffer.getvalue()))
-        except Exception:
-            pass
+        response.headers["Content-Length"] = str(content_length)
         return response
         
     except HTTPException:
@@ -1332,28 +1635,21 @@ async def database_status(session_id: str):
     """Check database connection status with detailed information"""
     try:
         # Verify session
-        verify_session(session_id)
+        await verify_session(session_id)
         
         # Get database configuration details
-        from database_config.postgresql_config import PostgreSQLConfig
-        db_config = PostgreSQLConfig()
+        db_config = _DB_CONFIG
         config_data = db_config.get_connection_params()
         
         # Check database connection
         try:
-            # Get a direct database connection using psycopg2
-            import psycopg2
-            connection_params = db_config.get_connection_params()
-            connection = psycopg2.connect(**connection_params)
+            # Borrow a pooled connection on a worker thread; a failed checkout or query
+            # lands in the error branch
+            loop = asyncio.get_running_loop()
+            rows = await loop.run_in_executor(None, _pg_fetchall, "SELECT version();")
+            db_version = rows[0][0]
             
-            if connection:
-                # Get database version info
-                cursor = connection.cursor()
-                cursor.execute("SELECT version();")
-                db_version = cursor.fetchone()[0]
-                cursor.close()
-                connection.close()
-                
+            if db_version:
                 return {
                     "status": "connected",
                     "message": "Database connection successful",
@@ -1403,28 +1699,17 @@ async def list_uploaded_files(session_id: str):
     """List files uploaded to the database"""
     try:
         # Verify session
-        verify_session(session_id)
-        
-        # Get database connection
-        from database_config.postgresql_config import PostgreSQLConfig
-        import psycopg2
+        await verify_session(session_id)
         
-        db_config = PostgreSQLConfig()
-        connection_params = db_config.get_connection_params()
-        connection = psycopg2.connect(**connection_params)
-        
-        cursor = connection.cursor()
-        cursor.execute("""
+        # Query on a pooled connection, off the event loop
+        loop = asyncio.get_running_loop()
+        files = await loop.run_in_executor(None, _pg_fetchall, """
             SELECT id, file_name, upload_date, uploaded_by, processing_status, 
                    records_count, file_size, processing_error
             FROM file_upload 
             ORDER BY upload_date DESC
         """)
         
-        files = cursor.fetchall()
-        cursor.close()
-        connection.close()
-        
         file_list = []
         for file_row in files:
             file_list.append({
@@ -1455,7 +1740,7 @@ async def update_file_status(file_id: str, session_id: str, status_data: dict):
     """Update the processing status of a file upload"""
     try:
         # Verify session
-        verify_session(session_id)
+        await verify_session(session_id)
         
         # Validate status
         new_status = status_data.get("status")
@@ -1474,11 +1759,8 @@ async def update_file_status(file_id: str, session_id: str, status_data: dict):
             )
         
         # Get database connection
-        from database_config.postgresql_config import PostgreSQLConfig
-        import psycopg2
-        from datetime import datetime
         
-        db_config = PostgreSQLConfig()
+        db_config = _DB_CONFIG
         connection_params = db_config.get_connection_params()
         connection = psycopg2.connect(**connection_params)
         
@@ -1533,16 +1815,17 @@ async def update_file_status(file_id: str, session_id: str, status_data: dict):
 @app.get("/api/debug/jobs")
 async def debug_jobs(session_id: str):
     """Debug endpoint to check processing jobs"""
-    verify_session(session_id)
+    await verify_session(session_id)
+    jobs = job_store.items()
     return {
-        "total_jobs": len(processing_jobs),
-        "job_ids": list(processing_jobs.keys()),
+        "total_jobs": len(jobs),
+        "job_ids": [k for k, _ in jobs],
         "jobs": {k: {
             "status": v.get("status"),
             "progress": v.get("progress"),
             "message": v.get("message"),
             "filename": v.get("filename")
-        } for k, v in processing_jobs.items()}
+        } for k, v in jobs}
     }
 
 @app.get("/", response_class=HTMLResponse)
@@ -1556,80 +1839,87 @@ async def read_root():
     else:
         return HTMLResponse(content="<h1>Company Data Scraper API</h1><p>React frontend not built. Run 'npm run build' in the frontend directory.</p>", status_code=200)
 
+# Expected upload headers (standardized format - preferred)
+REQUIRED_HEADERS = ['Company Name', 'LinkedIn_URL']
+OPTIONAL_HEADERS = ['Website_URL', 'Company_Size', 'Industry', 'Revenue']
+
+# Alternative naming conventions (for backward compatibility)
+HEADER_ALTERNATIVES = {
+    'Company Name': ['Company_Name', 'company_name'],
+    'LinkedIn_URL': ['Company Linkedin', 'linkedin_url', 'Company_Linkedin'],
+    'Website_URL': ['Website', 'Company_Website', 'company_website'],
+    'Company_Size': ['Size', 'company_size'],
+    'Industry': ['industry', 'Company_Industry'],
+    'Revenue': ['company_revenue', 'Company_Revenue']
+}
+
+# Every accepted header name (canonical or alternative) -> its canonical header
+ALIAS_TO_CANONICAL = {}
+for _canonical in REQUIRED_HEADERS + OPTIONAL_HEADERS:
+    ALIAS_TO_CANONICAL[_canonical] = _canonical
+    for _alt in HEADER_ALTERNATIVES.get(_canonical, []):
+        ALIAS_TO_CANONICAL[_alt] = _canonical
+
+def _read_headers_and_row_count(file_content: bytes, filename: str) -> tuple:
+    """Return (header list, data row count) of an uploaded sheet without building a DataFrame of it"""
+    name = filename.lower()
+    if name.endswith('.csv'):
+        file_headers = pd.read_csv(io.BytesIO(file_content), nrows=0).columns.tolist()
+        total_rows = len(pd.read_csv(io.BytesIO(file_content), usecols=[0])) if file_headers else 0
+        return file_headers, total_rows
+    
+    if name.endswith('.xlsx'):
+        import openpyxl
+        # Read-only mode streams rows from the XML instead of building the cell tree
+        wb = openpyxl.load_workbook(io.BytesIO(file_content), read_only=True, data_only=True)
+        try:
+            # pd.read_excel parses the first sheet, not the active one
+            rows = wb.worksheets[0].iter_rows(values_only=True)
+            header_row = list(next(rows, ()))
+            while header_row and header_row[-1] is None:
+                header_row.pop()
+            file_headers = [
+                value if value is not None else f"Unnamed: {idx}"
+                for idx, value in enumerate(header_row)
+            ]
+            # Like pandas, keep blank rows in the middle and drop only trailing ones
+            total_rows = 0
+            for count, row in enumerate(rows, start=1):
+                if any(value is not None for value in row):
+                    total_rows = count
+        finally:
+            wb.close()
+        return file_headers, total_rows
+    
+    # Legacy .xls has no streaming reader; parse it in full
+    df = pd.read_excel(io.BytesIO(file_content), engine=EXCEL_ENGINE)
+    return list(df.columns), len(df)
+
 def validate_file_headers(file_content: bytes, filename: str) -> Dict[str, Any]:
     """Validate that uploaded file has correct headers matching our template"""
     try:
-        import io
-        
-        # Expected headers (standardized format - preferred)
-        required_headers = ['Company Name', 'LinkedIn_URL']
-        optional_headers = ['Website_URL', 'Company_Size', 'Industry', 'Revenue']
-        all_expected_headers = required_headers + optional_headers
-        
-        # Alternative naming conventions (for backward compatibility)
-        header_alternatives = {
-            'Company Name': ['Company_Name', 'company_name'],
-            'LinkedIn_URL': ['Company Linkedin', 'linkedin_url', 'Company_Linkedin'],
-            'Website_URL': ['Website', 'Company_Website', 'company_website'],
-            'Company_Size': ['Size', 'company_size'],
-            'Industry': ['industry', 'Company_Industry'],
-            'Revenue': ['company_revenue', 'Company_Revenue']
-        }
+        all_expected_headers = REQUIRED_HEADERS + OPTIONAL_HEADERS
         
-        # Read file headers
-        if filename.lower().endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(io.BytesIO(file_content))
-        elif filename.lower().endswith('.csv'):
-            df = pd.read_csv(io.BytesIO(file_content))
+        # Read file headers (and the row count) without loading the whole sheet
+        if filename.lower().endswith(('.xlsx', '.xls', '.csv')):
+            file_headers, total_rows = _read_headers_and_row_count(file_content, filename)
         else:
             return {"valid": False, "error": "Unsupported file format"}
         
-        file_headers = list(df.columns)
-        
-        # Check for required headers
-        missing_required = []
-        found_headers = {}
-        
-        for required in required_headers:
-            found = False
-            if required in file_headers:
-                found_headers[required] = required
-                found = True
-            else:
-                # Check alternatives
-                alternatives = header_alternatives.get(required, [])
-                for alt in alternatives:
-                    if alt in file_headers:
-                        found_headers[required] = alt
-                        found = True
-                        break
-            
-            if not found:
-                missing_required.append(required)
-        
-        # Check for optional headers
-        found_optional = []
-        for optional in optional_headers:
-            if optional in file_headers:
-                found_optional.append(optional)
-            else:
-                alternatives = header_alternatives.get(optional, [])
-                for alt in alternatives:
-                    if alt in file_headers:
-                        found_optional.append(optional)
-                        break
-        
-        # Check for unexpected headers
-        recognized_headers = set()
-        for expected in all_expected_headers:
-            if expected in file_headers:
-                recognized_headers.add(expected)
-            alternatives = header_alternatives.get(expected, [])
-            for alt in alternatives:
-                if alt in file_headers:
-                    recognized_headers.add(alt)
-        
-        unexpected_headers = [h for h in file_headers if h not in recognized_headers]
+        # Classify every file header in a single pass through the alias map
+        matched = {}
+        unexpected_headers = []
+        for header in file_headers:
+            canonical = ALIAS_TO_CANONICAL.get(header)
+            if canonical is None:
+                unexpected_headers.append(header)
+            elif canonical not in matched or header == canonical:
+                # The canonical spelling wins over an alternative for the mapping
+                matched[canonical] = header
+        
+        found_headers = {required: matched[required] for required in REQUIRED_HEADERS if required in matched}
+        missing_required = [required for required in REQUIRED_HEADERS if required not in matched]
+        found_optional = [optional for optional in OPTIONAL_HEADERS if optional in matched]
         
         if missing_required:
             return {
@@ -1646,7 +1936,7 @@ def validate_file_headers(file_content: bytes, filename: str) -> Dict[str, Any]:
             "found_required": list(found_headers.keys()),
             "found_optional": found_optional,
             "unexpected_headers": unexpected_headers,
-            "total_rows": len(df),
+            "total_rows": total_rows,
             "header_mapping": found_headers
         }
         
@@ -1658,7 +1948,7 @@ async def validate_file_headers_endpoint(file: UploadFile = File(...), session_i
     """Validate file headers without uploading - for immediate user feedback"""
     try:
         # Verify session
-        verify_session(session_id)
+        await verify_session(session_id)
         
         # Validate file type
         if not file.filename:
@@ -1667,8 +1957,8 @@ async def validate_file_headers_endpoint(file: UploadFile = File(...), session_i
         if not file.filename.lower().endswith(('.xlsx', '.xls', '.csv')):
             raise HTTPException(status_code=400, detail="Only Excel and CSV files are supported")
         
-        # Read file content for validation
-        file_content = await file.read()
+        # Read file content for validation (size-capped)
+        file_content = await _read_upload_bounded(file)
         
         # Validate headers
         validation_result = validate_file_headers(file_content, file.filename)
@@ -1692,7 +1982,7 @@ async def upload_file_as_json(file: UploadFile = File(...), session_id: str = ""
     """Upload file as JSON to file_upload table with enhanced session and user management"""
     try:
         # Verify session with enhanced validation
-        session_data = verify_session(session_id)
+        session_data = await verify_session(session_id)
         if not session_data:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1711,8 +2001,8 @@ async def upload_file_as_json(file: UploadFile = File(...), session_id: str = ""
         if not file.filename.lower().endswith(('.xlsx', '.xls', '.csv')):
             raise HTTPException(status_code=400, detail="Only Excel and CSV files are supported")
         
-        # Read file content for validation
-        file_content = await file.read()
+        # Read file content for validation (size-capped)
+        file_content = await _read_upload_bounded(file)
         
         # Validate headers before processing
         validation_result = validate_file_headers(file_content, file.filename)
@@ -1727,42 +2017,28 @@ async def upload_file_as_json(file: UploadFile = File(...), session_id: str = ""
         try:
             file_processor = FileUploadProcessor()
             
-            # Create temporary file for processing
-            import tempfile
-            with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as temp_file:
-                temp_file.write(file_content)
-                temp_file_path = temp_file.name
+            # Upload as JSON with user-specific context, parsed straight from memory
+            file_upload_id = file_processor.upload_file_as_json_from_bytes(
+                file_content,
+                original_filename=file.filename,
+                uploaded_by=username,
+                user_id=user_id
+            )
             
-            try:
-                # Upload as JSON with user-specific context
-                file_upload_id = file_processor.upload_file_as_json(
-                    temp_file_path, 
-                    uploaded_by=username,
-                    original_filename=file.filename,
-                    user_id=user_id
-                )
-                
-                if file_upload_id:
-                    logger.info(f"✅ File uploaded as JSON: {file.filename} by user {username} (ID: {file_upload_id})")
-                    response_payload = {
-                        "success": True,
-                        "file_upload_id": file_upload_id,
-                        "message": f"File uploaded as JSON successfully (ID: {file_upload_id})",
-                        "filename": file.filename,
-                        "status": "pending_processing",
-                        "uploaded_by": username
-                    }
-                    # Ensure all values are JSON serializable (convert numpy types etc)
-                    return _clean_for_json_serialization(response_payload)
-                else:
-                    raise HTTPException(status_code=500, detail="Failed to upload file as JSON")
-                    
-            finally:
-                # Clean up temp file
-                try:
-                    os.unlink(temp_file_path)
-                except:
-                    pass
+            if file_upload_id:
+                logger.info(f"✅ File uploaded as JSON: {file.filename} by user {username} (ID: {file_upload_id})")
+                response_payload = {
+                    "success": True,
+                    "file_upload_id": file_upload_id,
+                    "message": f"File uploaded as JSON successfully (ID: {file_upload_id})",
+                    "filename": file.filename,
+                    "status": "pending_processing",
+                    "uploaded_by": username
+                }
+                # Ensure all values are JSON serializable (convert numpy types etc)
+                return _clean_for_json_serialization(response_payload)
+            else:
+                raise HTTPException(status_code=500, detail="Failed to upload file as JSON")
                     
         except ImportError as e:
             raise HTTPException(status_code=500, detail=f"File processor not available: {e}")
@@ -1779,23 +2055,17 @@ async def process_existing_file(file_id: str, session_id: str, scraping_enabled:
     """Start processing for an already-uploaded file (by file_upload_id)"""
     try:
         # Verify session
-        session = verify_session(session_id)
+        session = await verify_session(session_id)
         if not session:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid session")
 
-        # Load raw file content from database
-        from database_config.postgresql_config import PostgreSQLConfig
-        import psycopg2
-
-        db_config = PostgreSQLConfig()
-        conn_params = db_config.get_connection_params()
-        conn = psycopg2.connect(**conn_params)
-        cursor = conn.cursor()
+        # Load raw file content from database (pooled connection, off the event loop)
         # Note: DB column is `file_name` (not `filename`) - select it as filename
-        cursor.execute("SELECT raw_data, file_name FROM file_upload WHERE id = %s", (file_id,))
-        row = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        loop = asyncio.get_running_loop()
+        rows = await loop.run_in_executor(
+            None, _pg_fetchall, "SELECT raw_data, file_name FROM file_upload WHERE id = %s", (file_id,)
+        )
+        row = rows[0] if rows else None
 
         if not row or not row[0]:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Uploaded file not found or no raw data available")
@@ -1804,27 +2074,22 @@ async def process_existing_file(file_id: str, session_id: str, scraping_enabled:
         filename = row[1] or 'uploaded_file.xlsx'
 
         # Normalize raw_data into bytes that CompanyDataProcessor expects
-        import io
-        import json
-        import base64
-
+        # Structured raw_data is handed to the processor as a DataFrame; only
+        # byte-like payloads go through an Excel parse
         excel_bytes = None
+        df_reconstructed = None
         try:
             # If bytes were stored directly (preferred), use them
             if isinstance(raw_data, (bytes, bytearray)):
                 excel_bytes = bytes(raw_data)
 
-            # If a dict was stored (e.g., {'columns':..., 'data': [...]}) reconstruct to Excel bytes
+            # If a dict was stored (e.g., {'columns':..., 'data': [...]}) rebuild the DataFrame
             elif isinstance(raw_data, dict):
                 if 'data' in raw_data:
                     df_reconstructed = pd.DataFrame(raw_data['data'])
                 else:
                     # try to create DataFrame directly from dict
                     df_reconstructed = pd.DataFrame(raw_data)
-                buf = io.BytesIO()
-                df_reconstructed.to_excel(buf, index=False)
-                excel_bytes = buf.getvalue()
-                buf.close()
 
             # If a string was stored, it could be JSON or base64 or raw CSV/text
             elif isinstance(raw_data, str):
@@ -1833,18 +2098,10 @@ async def process_existing_file(file_id: str, session_id: str, scraping_enabled:
                     parsed = json.loads(raw_data)
                     if isinstance(parsed, dict) and 'data' in parsed:
                         df_reconstructed = pd.DataFrame(parsed['data'])
-                        buf = io.BytesIO()
-                        df_reconstructed.to_excel(buf, index=False)
-                        excel_bytes = buf.getvalue()
-                        buf.close()
                     else:
                         # If parsed to something else, attempt to create DataFrame
                         try:
                             df_reconstructed = pd.DataFrame(parsed)
-                            buf = io.BytesIO()
-                            df_reconstructed.to_excel(buf, index=False)
-                            excel_bytes = buf.getvalue()
-                            buf.close()
                         except Exception:
                             # Fallback to base64 decode
                             excel_bytes = base64.b64decode(raw_data)
@@ -1864,22 +2121,22 @@ async def process_existing_file(file_id: str, session_id: str, scraping_enabled:
                     excel_bytes = None
         except Exception as _ex:
             excel_bytes = None
+            df_reconstructed = None
 
-        if not excel_bytes:
+        if df_reconstructed is None and not excel_bytes:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unable to reconstruct uploaded file bytes from database raw_data")
 
-        # Create in-memory job with normalized bytes
+        # Create in-memory job; the data is handed straight to the worker thread
         job_id = str(uuid.uuid4())
-        processing_jobs[file_id] = {
+        job_store.set(file_id, {
             "id": job_id,
             "file_id": file_id,
             "filename": filename,
             "status": "processing",
             "progress": 0,
             "message": "Processing started",
-            "file_content": excel_bytes,
             "result": None
-        }
+        })
 
         # Immediately update DB status to 'processing' so UI reflects the change
         try:
@@ -1909,28 +2166,30 @@ async def process_existing_file(file_id: str, session_id: str, scraping_enabled:
         # Start processing in background thread
         def _start():
             try:
-                sys.path.insert(0, os.path.dirname(__file__))
-                from company_processor import CompanyDataProcessor
+                from backend_api.company_processor import CompanyDataProcessor
                 processor = CompanyDataProcessor()
 
                 def update_progress(percent, message):
-                    processing_jobs[file_id]["progress"] = percent
-                    processing_jobs[file_id]["message"] = message
+                    job_store.update(file_id, progress=percent, message=message)
 
-                # Use the normalized bytes stored in the job (ensures bytes-like object)
-                job_bytes = processing_jobs[file_id].get("file_content")
                 result = processor.process_file(
-                    file_content=job_bytes,
+                    file_content=excel_bytes,
+                    df=df_reconstructed,
                     filename=filename,
                     scraping_enabled=scraping_enabled,
                     ai_analysis_enabled=ai_analysis_enabled,
                     progress_callback=update_progress
                 )
 
-                processing_jobs[file_id]["result"] = result
-                processing_jobs[file_id]["progress"] = 100
-                processing_jobs[file_id]["status"] = "completed" if result.get("success") else "failed"
-                processing_jobs[file_id]["message"] = result.get("summary", "Processing finished")
+                job_store.update(
+                    file_id,
+                    result=result,
+                    # Status polls serve this copy; the result never changes once stored
+                    cleaned_result=_clean_result_for_status(result),
+                    progress=100,
+                    status="completed" if result.get("success") else "failed",
+                    message=result.get("summary", "Processing finished")
+                )
 
                 # Sync status to database using FileUploadProcessor helper
                 try:
@@ -1946,8 +2205,7 @@ async def process_existing_file(file_id: str, session_id: str, scraping_enabled:
                     # Log but don't raise — keep job status updated
                     print(f"❌ Failed to sync processing completion to DB for file {file_id}: {dbsync_err}")
             except Exception as e:
-                processing_jobs[file_id]["status"] = "failed"
-                processing_jobs[file_id]["message"] = str(e)
+                job_store.update(file_id, status="failed", message=str(e))
 
         _threading.Thread(target=_start, daemon=True).start()
 
@@ -1959,12 +2217,25 @@ async def process_existing_file(file_id: str, session_id: str, scraping_enabled:
         logger.error(f"Error starting processing for {file_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Error starting processing: {str(e)}")
 
+def _store_upload_as_json(file_content: bytes, filename: str, username: str):
+    """Store an upload through FileUploadProcessor and queue its processing job; returns the file_upload id"""
+    file_processor = FileUploadProcessor()
+    file_upload_id = file_processor.upload_file_as_json_from_bytes(
+        file_content,
+        original_filename=filename,
+        uploaded_by=username
+    )
+    if file_upload_id:
+        # Create a processing job (status: pending)
+        file_processor.create_processing_job(file_upload_id, job_type="data_extraction", uploaded_by=username)
+    return file_upload_id
+
 @app.post("/api/files/upload-and-process")
 async def upload_and_process_file(file: UploadFile = File(...), session_id: str = ""):
     """Upload file as JSON and immediately process it with concurrent user support"""
     try:
         # Verify session with enhanced validation
-        session_data = verify_session(session_id)
+        session_data = await verify_session(session_id)
         if not session_data:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1972,7 +2243,7 @@ async def upload_and_process_file(file: UploadFile = File(...), session_id: str
             )
         try:
             # Verify session with enhanced validation
-            session_data = verify_session(session_id)
+            session_data = await verify_session(session_id)
             if not session_data:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1987,29 +2258,20 @@ async def upload_and_process_file(file: UploadFile = File(...), session_id: str
                 raise HTTPException(status_code=400, detail="No file selected")
             if not file.filename.lower().endswith(('.xlsx', '.xls', '.csv')):
                 raise HTTPException(status_code=400, detail="Only Excel and CSV files are supported")
-            file_content = await file.read()
-            validation_result = validate_file_headers(file_content, file.filename)
+            file_content = await _read_upload_bounded(file)
+            # Header parsing and the database writes are blocking; keep them off the event loop
+            loop = asyncio.get_running_loop()
+            validation_result = await loop.run_in_executor(None, validate_file_headers, file_content, file.filename)
             if not validation_result["valid"]:
                 raise HTTPException(
                     status_code=400,
                     detail=f"Invalid file format: {validation_result['error']}"
                 )
-            file_processor = None
-            temp_file_path = None
             try:
-                file_processor = FileUploadProcessor()
-                import tempfile
-                with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file.filename)[1]) as temp_file:
-                    temp_file.write(file_content)
-                    temp_file_path = temp_file.name
-                file_upload_id = file_processor.upload_file_as_json(
-                    temp_file_path,
-                    uploaded_by=username,
-                    original_filename=file.filename
+                file_upload_id = await loop.run_in_executor(
+                    None, _store_upload_as_json, file_content, file.filename, username
                 )
                 if file_upload_id:
-                    # Create a processing job (status: pending)
-                    file_processor.create_processing_job(file_upload_id, job_type="data_extraction", uploaded_by=username)
                     response = {
                         "success": True,
                         "file_upload_id": file_upload_id,
@@ -2025,18 +2287,12 @@ async def upload_and_process_file(file: UploadFile = File(...), session_id: str
             except Exception as e:
                 logger.error(f"❌ File processor error: {str(e)}")
                 raise HTTPException(status_code=500, detail=f"File processor error: {str(e)}")
-            finally:
-                # Clean up temp file if created
-                if temp_file_path:
-                    try:
-                        # 'os' is already imported globally
-                        os.unlink(temp_file_path)
-                    except Exception:
-                        pass
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"❌ Error in upload_and_process_file: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Upload and process error: {str(e)}")
-        session_data = verify_session(session_id)
+        session_data = await verify_session(session_id)
         if not session_data:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -2076,11 +2332,10 @@ async def upload_and_process_file(file: UploadFile = File(...), session_id: str
 @app.get("/api/files/uploads")
 async def get_uploaded_files(session_id: str):
     """Get list of uploaded files from file_upload table with enhanced session validation"""
-    import time
     start_time = time.time()
     try:
         # Verify session with enhanced validation
-        session_data = verify_session(session_id)
+        session_data = await verify_session(session_id)
         if not session_data:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -2089,16 +2344,8 @@ async def get_uploaded_files(session_id: str):
 
         # Query real uploaded files from database and adapt to UI's expected shape
         try:
-            from database_config.postgresql_config import PostgreSQLConfig
-            import psycopg2
-
-            db_config = PostgreSQLConfig()
-            connection_params = db_config.get_connection_params()
-            connection = psycopg2.connect(**connection_params)
-
-            cursor = connection.cursor()
-            cursor.execute(
-                """
+            loop = asyncio.get_running_loop()
+            rows = await loop.run_in_executor(None, _pg_fetchall, """
                 SELECT fu.id, fu.file_name, fu.upload_date, fu.uploaded_by, fu.processing_status, 
                        fu.records_count,
                        COUNT(cd.id) as total_records,
@@ -2108,12 +2355,7 @@ async def get_uploaded_files(session_id: str):
                 LEFT JOIN company_data cd ON fu.id = cd.file_upload_id
                 GROUP BY fu.id, fu.file_name, fu.upload_date, fu.uploaded_by, fu.processing_status, fu.records_count
                 ORDER BY fu.upload_date DESC
-                """
-            )
-
-            rows = cursor.fetchall()
-            cursor.close()
-            connection.close()
+            """)
 
             files = []
             for r in rows:
@@ -2151,12 +2393,9 @@ async def delete_file_and_data(file_id: str, session_id: str = ""):
     """Delete file and all associated data from all tables (file_upload, processing_jobs, company_data)"""
     try:
         # Verify session
-        verify_session(session_id)
-        
-        from database_config.postgresql_config import PostgreSQLConfig
-        import psycopg2
+        await verify_session(session_id)
         
-        db_config = PostgreSQLConfig()
+        db_config = _DB_CONFIG
         connection_params = db_config.get_connection_params()
         connection = psycopg2.connect(**connection_params)
         connection.autocommit = False  # Use transaction
@@ -2241,12 +2480,9 @@ async def view_file_data(file_id: str, session_id: str, limit: int = 100, offset
     """View processed company data for a specific file with pagination"""
     try:
         # Verify session
-        verify_session(session_id)
-        
-        from database_config.postgresql_config import PostgreSQLConfig
-        import psycopg2
+        await verify_session(session_id)
         
-        db_config = PostgreSQLConfig()
+        db_config = _DB_CONFIG
         connection_params = db_config.get_connection_params()
         connection = psycopg2.connect(**connection_params)
         cursor = connection.cursor()
@@ -2331,13 +2567,10 @@ async def edit_company_record(record_id: str, session_id: str, update_data: dict
     """Edit a specific company data record"""
     try:
         # Verify session
-        verify_session(session_id)
+        await verify_session(session_id)
         
-        from database_config.postgresql_config import PostgreSQLConfig
-        import psycopg2
-        from datetime import datetime
         
-        db_config = PostgreSQLConfig()
+        db_config = _DB_CONFIG
         connection_params = db_config.get_connection_params()
         connection = psycopg2.connect(**connection_params)
         cursor = connection.cursor()
@@ -2410,12 +2643,9 @@ async def delete_company_record(record_id: str, session_id: str):
     """Delete a specific company data record"""
     try:
         # Verify session
-        verify_session(session_id)
+        await verify_session(session_id)
         
-        from database_config.postgresql_config import PostgreSQLConfig
-        import psycopg2
-        
-        db_config = PostgreSQLConfig()
+        db_config = _DB_CONFIG
         connection_params = db_config.get_connection_params()
         connection = psycopg2.connect(**connection_params)
         cursor = connection.cursor()
@@ -2455,13 +2685,13 @@ async def run_process_pending_now(session_id: str = ""):
     # Verify session (optional: could enforce admin)
     if session_id:
         try:
-            verify_session(session_id)
+            await verify_session(session_id)
         except Exception:
             # proceed even if session invalid; comment to enforce
             pass
 
-    # Prevent overlapping runs: check if processor is busy
-    if getattr(_process_pending_uploads, "_busy", False):
+    # Prevent overlapping runs: check if a batch is currently running
+    if scheduler_state.get("running"):
         return {"success": False, "message": "Processing already in progress; skipping new start."}
 
     # Fire-and-forget thread to run the job once
@@ -2478,7 +2708,7 @@ async def start_scheduler(session_id: str = "", mode: str = "cron", interval_min
     """
     if session_id:
         try:
-            verify_session(session_id)
+            await verify_session(session_id)
         except Exception:
             pass
 
@@ -2531,7 +2761,7 @@ async def set_scheduler_interval_endpoint(minutes: int, session_id: str = ""):
     """
     if session_id:
         try:
-            verify_session(session_id)
+            await verify_session(session_id)
         except Exception:
             pass
 
@@ -2577,7 +2807,7 @@ async def stop_scheduler(session_id: str = ""):
     """Stop the periodic scheduler job (does not stop a currently running run)."""
     if session_id:
         try:
-            verify_session(session_id)
+            await verify_session(session_id)
         except Exception:
             pass
 
@@ -2744,6 +2974,12 @@ async def startup_event():
     except Exception as e:
         logger.error(f"❌ Failed to auto-start scheduler: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled database connections and worker threads on shutdown"""
+    _EXPORT_EXECUTOR.shutdown(wait=False)
+    get_shared_engine(_DB_CONFIG).dispose()
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
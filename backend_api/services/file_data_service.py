@@ -131,19 +131,14 @@ class FileDataService:
             with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
                 df.to_excel(writer, sheet_name='Processed Companies', index=False)
                 
-                # Auto-adjust column widths
+                # Auto-adjust column widths from the DataFrame in one vectorized pass
+                # (header included) instead of re-reading every written cell
+                from openpyxl.utils import get_column_letter
                 worksheet = writer.sheets['Processed Companies']
-                for column in worksheet.columns:
-                    max_length = 0
-                    column_letter = column[0].column_letter
-                    for cell in column:
-                        try:
-                            if len(str(cell.value)) > max_length:
-                                max_length = len(str(cell.value))
-                        except:
-                            pass
-                    adjusted_width = min(max_length + 2, 50)
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
+                value_lengths = df.astype(str).apply(lambda col: col.str.len().max())
+                for idx, column_name in enumerate(columns, 1):
+                    max_length = max(int(value_lengths[column_name]), len(column_name))
+                    worksheet.column_dimensions[get_column_letter(idx)].width = min(max_length + 2, 50)
             
             excel_buffer.seek(0)
             cursor.close()
@@ -151,7 +146,7 @@ class FileDataService:
             
             return {
                 "success": True,
-                "data": excel_buffer.getvalue(),
+                "stream": excel_buffer,
                 "filename": f"processed_data_{file_id}.xlsx",
                 "records_count": len(records)
             }
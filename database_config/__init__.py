@@ -0,0 +1 @@
+# This file makes database_config a Python package.
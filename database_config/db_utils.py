@@ -5,6 +5,7 @@ Provides easy-to-use functions for database operations
 
 import os
 import sys
+import threading
 from typing import Optional, Dict, Any, List
 import pandas as pd
 
@@ -19,6 +20,40 @@ except ImportError as e:
     print("💡 Install with: pip install psycopg2-binary sqlalchemy")
     POSTGRESQL_AVAILABLE = False
 
+# Pooled SQLAlchemy engines shared by every DatabaseConnection, keyed by database URL
+_ENGINES = {}
+_ENGINES_LOCK = threading.Lock()
+
+def _get_shared_engine(config) -> Any:
+    """Return the process-wide pooled engine for this configuration, creating it on first use"""
+    database_url = config.get_database_url()
+    
+    with _ENGINES_LOCK:
+        engine = _ENGINES.get(database_url)
+        if engine is None:
+            from sqlalchemy import create_engine
+            
+            engine = create_engine(
+                database_url,
+                pool_size=int(config.config.get('DB_POOL_SIZE', 10)),
+                max_overflow=int(config.config.get('DB_MAX_OVERFLOW', 20)),
+                pool_timeout=int(config.config.get('DB_POOL_TIMEOUT', 30)),
+                pool_recycle=int(config.config.get('DB_POOL_RECYCLE', 1800)),
+                pool_pre_ping=True
+            )
+            _ENGINES[database_url] = engine
+    
+    return engine
+
+def get_shared_engine(config=None) -> Any:
+    """Return the process-wide pooled engine; the one pool every module should borrow from
+    
+    Raw psycopg2 connections come from engine.raw_connection() (close() returns
+    them to the pool). An exhausted pool blocks up to DB_POOL_TIMEOUT seconds
+    instead of failing straight away.
+    """
+    return _get_shared_engine(config or PostgreSQLConfig())
+
 class DatabaseConnection:
     """Unified database connection interface"""
     
@@ -34,11 +69,30 @@ class DatabaseConnection:
             raise ValueError(f"Unsupported database type: {db_type}")
     
     def connect(self) -> bool:
-        """Connect to the database"""
+        """Connect to the database
+        
+        Uses the shared pooled engine, so repeated connects (and new
+        DatabaseConnection instances) reuse open connections instead of
+        building a new engine and handshaking each time. Once connected,
+        further calls return immediately; the engine's pre-ping already
+        checks each connection as it is checked out.
+        """
         if not self.manager:
             return False
-            
-        return self.manager.initialize()
+        
+        if self.manager.engine is not None and self.manager.engine is _ENGINES.get(self.config.get_database_url()):
+            return True
+        
+        try:
+            engine = _get_shared_engine(self.config)
+            # Checking out a pooled connection (with pre-ping) verifies the database is reachable
+            with engine.connect():
+                pass
+            self.manager.engine = engine
+            return True
+        except Exception as e:
+            print(f"❌ Database connection failed: {str(e)}")
+            return False
     
     def test_connection(self) -> bool:
         """Test database connection"""
@@ -108,22 +162,75 @@ class DatabaseConnection:
             print(traceback.format_exc())
             return False
     
-    def query_to_dataframe(self, query: str) -> Optional[pd.DataFrame]:
-        """Execute query and return results as DataFrame"""
+    def copy_dataframe(self, df: pd.DataFrame, table_name: str = "company_data", chunk_size: int = 5000) -> bool:
+        """Bulk-load a DataFrame with PostgreSQL COPY ... FROM STDIN
+        
+        Rows are streamed as CSV in chunks of chunk_size inside a single
+        transaction. Falls back to insert_dataframe if COPY fails.
+        """
+        try:
+            if not self.manager or not self.manager.engine:
+                print("❌ Database not connected")
+                return False
+            
+            if df.empty:
+                return True
+            
+            import io
+            columns = ", ".join(f'"{col}"' for col in df.columns)
+            copy_sql = f"COPY {table_name} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+            
+            raw_connection = self.manager.engine.raw_connection()
+            try:
+                cursor = raw_connection.cursor()
+                for start in range(0, len(df), chunk_size):
+                    buffer = io.StringIO()
+                    df.iloc[start:start + chunk_size].to_csv(buffer, index=False, header=False, na_rep='\\N')
+                    buffer.seek(0)
+                    cursor.copy_expert(copy_sql, buffer)
+                cursor.close()
+                raw_connection.commit()
+            except Exception:
+                raw_connection.rollback()
+                raise
+            finally:
+                raw_connection.close()
+            
+            print(f"✅ Copied {len(df)} records into {table_name} using COPY")
+            return True
+            
+        except Exception as e:
+            print(f"⚠️ COPY into {table_name} failed, falling back to insert: {str(e)}")
+            return self.insert_dataframe(df, table_name)
+    
+    def query_to_dataframe(self, query: str, params: Optional[Dict[str, Any]] = None) -> Optional[pd.DataFrame]:
+        """Execute query and return results as DataFrame
+        
+        Bind values for :name placeholders are passed via params so the
+        SQL text stays constant across calls.
+        """
         try:
             if not self.manager or not self.manager.engine:
                 print("❌ Database not connected")
                 return None
             
-            df = pd.read_sql_query(query, self.manager.engine)
+            if params is not None and isinstance(query, str):
+                from sqlalchemy import text
+                query = text(query)
+            
+            df = pd.read_sql_query(query, self.manager.engine, params=params)
             return df
             
         except Exception as e:
             print(f"❌ Query failed: {str(e)}")
             return None
     
-    def execute_query(self, query: str) -> bool:
-        """Execute non-SELECT queries (INSERT, UPDATE, DELETE)"""
+    def execute_query(self, query: str, autocommit: bool = False) -> bool:
+        """Execute non-SELECT queries (INSERT, UPDATE, DELETE)
+        
+        Set autocommit=True for statements that cannot run inside a
+        transaction block, such as CREATE INDEX CONCURRENTLY.
+        """
         try:
             if not self.manager or not self.manager.engine:
                 print("❌ Database not connected")
@@ -131,6 +238,8 @@ class DatabaseConnection:
             
             from sqlalchemy import text
             with self.manager.engine.connect() as connection:
+                if autocommit:
+                    connection = connection.execution_options(isolation_level="AUTOCOMMIT")
                 result = connection.execute(text(query))
                 connection.commit()
                 print(f"✅ Query executed successfully. Affected rows: {result.rowcount if hasattr(result, 'rowcount') else 'N/A'}")
@@ -0,0 +1,21 @@
+"""
+Excel reader selection
+Shared choice of the pandas read_excel engine for uploaded workbooks
+"""
+
+import pandas as pd
+
+def _pandas_supports_calamine() -> bool:
+    """pandas only accepts engine="calamine" from 2.2 on"""
+    try:
+        major, minor = (int(part) for part in pd.__version__.split('.')[:2])
+    except ValueError:
+        return False
+    return (major, minor) >= (2, 2)
+
+# Prefer the Rust-backed calamine reader when it is installed and pandas can use it
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = "calamine" if _pandas_supports_calamine() else None
+except ImportError:
+    EXCEL_ENGINE = None  # pandas default (openpyxl/xlrd)
@@ -5,6 +5,7 @@ Handles JSON storage of uploaded files and scheduled processing
 
 import os
 import sys
+import io
 import json
 import hashlib
 import pandas as pd
@@ -21,8 +22,11 @@ parent_dir = os.path.dirname(current_dir)
 scrapers_dir = os.path.join(parent_dir, 'scrapers')
 if scrapers_dir not in sys.path:
     sys.path.insert(0, scrapers_dir)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
 
-from db_utils import get_database_connection
+# Package-qualified so this shares the same db_utils module (and engine cache) as the API
+from database_config.db_utils import get_database_connection
 from config_loader import ConfigLoader
 
 # Import LinkedIn scraper
@@ -45,12 +49,44 @@ except ImportError as e:
     print(f"⚠️ LinkedIn scraper not available: {e}")
     LINKEDIN_SCRAPER_AVAILABLE = False
 
+# Claim pending uploads atomically so concurrent schedulers/runners never pick the same file
+CLAIM_PENDING_SQL = """
+    WITH claimed AS (
+        SELECT id FROM file_upload
+        WHERE processing_status = 'pending'
+        ORDER BY upload_date ASC
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE file_upload fu
+    SET processing_status = 'processing'
+    FROM claimed
+    WHERE fu.id = claimed.id
+    RETURNING fu.id, fu.file_name
+"""
+
+# Same claim restricted to a chosen set of uploads (e.g. one per user in single-job mode)
+CLAIM_UPLOADS_BY_ID_SQL = """
+    WITH claimed AS (
+        SELECT id FROM file_upload
+        WHERE id IN :file_ids AND processing_status = 'pending'
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE file_upload fu
+    SET processing_status = 'processing'
+    FROM claimed
+    WHERE fu.id = claimed.id
+    RETURNING fu.id, fu.file_name
+"""
+
 class FileUploadProcessor:
     """Handles file upload processing and JSON storage with single job per user support"""
     
-    def __init__(self):
+    def __init__(self, linkedin_scraper=None):
         self.db_connection = get_database_connection("postgresql")
         self.config = ConfigLoader()
+        # LinkedIn scraper is created on first use and reused for every file this processor handles
+        self._linkedin_scraper = linkedin_scraper
         # Ensure connection is established
         if self.db_connection:
             self.db_connection.connect()
@@ -86,97 +122,132 @@ class FileUploadProcessor:
                 print(f"Unsupported file format: {file_path}")
                 return None
             
-            # Convert DataFrame to JSON
-            # Handle NaN values by converting to None/null for proper JSON
-            df_clean = df.fillna('')  # Replace NaN with empty string
-            
-            # Convert to records and ensure proper JSON serialization
-            data_records = []
-            for _, row in df_clean.iterrows():
-                record = {}
-                for col in df_clean.columns:
-                    value = row[col]
-                    # Convert various null-like values to proper null
-                    if pd.isna(value) or value == 'nan' or value == 'NaN' or str(value).strip() == '':
-                        record[col] = None
-                    else:
-                        record[col] = str(value) if not isinstance(value, (int, float, bool)) else value
-                data_records.append(record)
-            
-            raw_data = {
-                "columns": list(df.columns),
-                "data": data_records,
-                "metadata": {
-                    "total_rows": len(df),
-                    "total_columns": len(df.columns),
-                    "upload_timestamp": datetime.now().isoformat(),
-                    "file_extension": os.path.splitext(file_path)[1].lower()
-                }
-            }
-            
-            # Calculate file hash
-            file_hash = self.calculate_file_hash(file_path)
-            
-            # Check if file already exists
-            existing_file = self.check_duplicate_file(file_hash)
-            if existing_file:
-                print(f"File already uploaded with ID: {existing_file}")
-                return existing_file
-            
-            # Get file info
-            file_name = original_filename if original_filename else os.path.basename(file_path)
-            file_size = os.path.getsize(file_path)
-            
-            # Insert into database - Check and reconnect if needed
-            if not self.db_connection or not self.db_connection.test_connection():
-                print("❌ Database not connected - attempting to reconnect...")
-                self.db_connection = get_database_connection("postgresql")
+            return self._store_dataframe_as_json(
+                df,
+                file_name=original_filename if original_filename else os.path.basename(file_path),
+                file_path=file_path,
+                file_size=os.path.getsize(file_path),
+                file_hash=self.calculate_file_hash(file_path),
+                uploaded_by=uploaded_by,
+                user_id=user_id
+            )
                 
-                if self.db_connection:
-                    self.db_connection.connect()  # Initialize the connection
+        except Exception as e:
+            print(f"❌ Error uploading file: {str(e)}")
+            return None
+    
+    def upload_file_as_json_from_bytes(self, file_content: bytes, original_filename: str, uploaded_by: str = "GUI_User", user_id: int = None) -> Optional[str]:
+        """
+        Upload in-memory file content (e.g. an HTTP upload) as JSON to file_upload table
+        Returns file_upload_id if successful, None if failed
+        """
+        try:
+            # Read file into DataFrame straight from memory
+            if original_filename.lower().endswith(('.xlsx', '.xls')):
+                df = pd.read_excel(io.BytesIO(file_content))
+            elif original_filename.lower().endswith('.csv'):
+                df = pd.read_csv(io.BytesIO(file_content))
+            else:
+                print(f"Unsupported file format: {original_filename}")
+                return None
+            
+            return self._store_dataframe_as_json(
+                df,
+                file_name=original_filename,
+                file_path="database_storage",  # No file path, stored in database
+                file_size=len(file_content),
+                file_hash=hashlib.sha256(file_content).hexdigest(),
+                uploaded_by=uploaded_by,
+                user_id=user_id
+            )
                 
-                if not self.db_connection or not self.db_connection.test_connection():
-                    print("❌ Failed to reconnect to database")
-                    return None
+        except Exception as e:
+            print(f"❌ Error uploading file: {str(e)}")
+            return None
+    
+    def _store_dataframe_as_json(self, df: pd.DataFrame, file_name: str, file_path: str, file_size: int,
+                                 file_hash: str, uploaded_by: str, user_id: int = None) -> Optional[str]:
+        """Insert an uploaded file's DataFrame into file_upload and queue its processing job"""
+        # Check if file already exists
+        existing_file = self.check_duplicate_file(file_hash)
+        if existing_file:
+            print(f"File already uploaded with ID: {existing_file}")
+            return existing_file
+        
+        # Convert DataFrame to JSON
+        # Handle NaN values by converting to None/null for proper JSON
+        df_clean = df.fillna('')  # Replace NaN with empty string
+        
+        # Convert to records and ensure proper JSON serialization
+        data_records = []
+        for _, row in df_clean.iterrows():
+            record = {}
+            for col in df_clean.columns:
+                value = row[col]
+                # Convert various null-like values to proper null
+                if pd.isna(value) or value == 'nan' or value == 'NaN' or str(value).strip() == '':
+                    record[col] = None
                 else:
-                    print("✅ Database reconnected successfully")
-                
-            # Create DataFrame for insertion
-            upload_data = pd.DataFrame([{
-                'file_name': file_name,
-                'file_path': file_path,
-                'file_size': file_size,
-                'original_columns': json.dumps(list(df.columns)),
-                'raw_data': json.dumps(raw_data),
-                'uploaded_by': uploaded_by,
-                'user_id': user_id,
-                'processing_status': 'pending',
-                'records_count': len(df),
-                'file_hash': file_hash
-            }])
+                    record[col] = str(value) if not isinstance(value, (int, float, bool)) else value
+            data_records.append(record)
+        
+        raw_data = {
+            "columns": list(df.columns),
+            "data": data_records,
+            "metadata": {
+                "total_rows": len(df),
+                "total_columns": len(df.columns),
+                "upload_timestamp": datetime.now().isoformat(),
+                "file_extension": os.path.splitext(file_name)[1].lower()
+            }
+        }
+        
+        # Insert into database - Check and reconnect if needed
+        if not self.db_connection or not self.db_connection.test_connection():
+            print("❌ Database not connected - attempting to reconnect...")
+            self.db_connection = get_database_connection("postgresql")
             
-            # Insert and get the ID
-            print(f"🔄 Attempting to insert file data into database...")
-            success = self.db_connection.insert_dataframe(upload_data, "file_upload")
+            if self.db_connection:
+                self.db_connection.connect()  # Initialize the connection
             
-            if success:
-                print("✅ Database insertion successful")
-                # Get the inserted record ID
-                file_upload_id = self.get_latest_upload_id(file_hash)
-                
-                # Create processing job
-                if file_upload_id:
-                    self.create_processing_job(file_upload_id, "data_extraction")
-                    print(f"✅ Processing job created for file ID: {file_upload_id}")
-                    
-                print(f"✅ File uploaded successfully with ID: {file_upload_id}")
-                return file_upload_id
-            else:
-                print("❌ Failed to upload file to database - insertion failed")
+            if not self.db_connection or not self.db_connection.test_connection():
+                print("❌ Failed to reconnect to database")
                 return None
+            else:
+                print("✅ Database reconnected successfully")
+            
+        # Create DataFrame for insertion
+        upload_data = pd.DataFrame([{
+            'file_name': file_name,
+            'file_path': file_path,
+            'file_size': file_size,
+            'original_columns': json.dumps(list(df.columns)),
+            'raw_data': json.dumps(raw_data),
+            'uploaded_by': uploaded_by,
+            'user_id': user_id,
+            'processing_status': 'pending',
+            'records_count': len(df),
+            'file_hash': file_hash
+        }])
+        
+        # Insert and get the ID
+        print(f"🔄 Attempting to insert file data into database...")
+        success = self.db_connection.insert_dataframe(upload_data, "file_upload")
+        
+        if success:
+            print("✅ Database insertion successful")
+            # Get the inserted record ID
+            file_upload_id = self.get_latest_upload_id(file_hash)
+            
+            # Create processing job
+            if file_upload_id:
+                self.create_processing_job(file_upload_id, "data_extraction")
+                print(f"✅ Processing job created for file ID: {file_upload_id}")
                 
-        except Exception as e:
-            print(f"❌ Error uploading file: {str(e)}")
+            print(f"✅ File uploaded successfully with ID: {file_upload_id}")
+            return file_upload_id
+        else:
+            print("❌ Failed to upload file to database - insertion failed")
             return None
     
     def check_duplicate_file(self, file_hash: str) -> Optional[str]:
@@ -185,8 +256,8 @@ class FileUploadProcessor:
             if not self.db_connection:
                 return None
                 
-            query = f"SELECT id FROM file_upload WHERE file_hash = '{file_hash}' LIMIT 1"
-            result = self.db_connection.query_to_dataframe(query)
+            query = "SELECT id FROM file_upload WHERE file_hash = :file_hash LIMIT 1"
+            result = self.db_connection.query_to_dataframe(query, params={'file_hash': file_hash})
             
             if result is not None and not result.empty:
                 return result.iloc[0]['id']
@@ -202,13 +273,13 @@ class FileUploadProcessor:
             if not self.db_connection:
                 return None
                 
-            query = f"""
+            query = """
                 SELECT id FROM file_upload 
-                WHERE file_hash = '{file_hash}' 
+                WHERE file_hash = :file_hash 
                 ORDER BY upload_date DESC 
                 LIMIT 1
             """
-            result = self.db_connection.query_to_dataframe(query)
+            result = self.db_connection.query_to_dataframe(query, params={'file_hash': file_hash})
             
             if result is not None and not result.empty:
                 return result.iloc[0]['id']
@@ -224,15 +295,15 @@ class FileUploadProcessor:
             if not self.db_connection:
                 return False
             # Prevent duplicate jobs for the same file_upload_id
-            check_query = f"SELECT id FROM processing_jobs WHERE file_upload_id = '{file_upload_id}' AND job_status IN ('queued', 'processing', 'pending')"
-            existing_jobs = self.db_connection.query_to_dataframe(check_query)
+            check_query = "SELECT id FROM processing_jobs WHERE file_upload_id = :file_upload_id AND job_status IN ('queued', 'processing', 'pending')"
+            existing_jobs = self.db_connection.query_to_dataframe(check_query, params={'file_upload_id': file_upload_id})
             if existing_jobs is not None and not existing_jobs.empty:
                 print(f"⚠️ Job already exists for file_upload_id {file_upload_id}, skipping duplicate job creation.")
                 return False
             # Get uploaded_by from file_upload table if not provided
             if not uploaded_by:
-                upload_info_query = f"SELECT uploaded_by FROM file_upload WHERE id = '{file_upload_id}'"
-                upload_info = self.db_connection.query_to_dataframe(upload_info_query)
+                upload_info_query = "SELECT uploaded_by FROM file_upload WHERE id = :file_upload_id"
+                upload_info = self.db_connection.query_to_dataframe(upload_info_query, params={'file_upload_id': file_upload_id})
                 if upload_info is not None and not upload_info.empty:
                     uploaded_by = upload_info.iloc[0]['uploaded_by']
                 else:
@@ -302,22 +373,70 @@ class FileUploadProcessor:
             print(f"Error getting pending uploads: {e}")
             return None
     
+    def claim_pending_uploads(self, batch_size: int = 50, file_ids: Optional[List] = None) -> Optional[pd.DataFrame]:
+        """Atomically mark up to batch_size pending uploads as 'processing' and return them
+        
+        Rows locked by a concurrent claim are skipped, so several schedulers can
+        claim batches at the same time without picking the same upload twice.
+        With file_ids, only those uploads are claimed (the ones still pending).
+        """
+        try:
+            if not self.db_connection:
+                return None
+            from sqlalchemy import text, bindparam
+            if file_ids is not None:
+                if not file_ids:
+                    return pd.DataFrame(columns=['id', 'file_name'])
+                query = text(CLAIM_UPLOADS_BY_ID_SQL).bindparams(bindparam('file_ids', expanding=True))
+                params = {'file_ids': list(file_ids)}
+            else:
+                query = text(CLAIM_PENDING_SQL)
+                params = {'batch_size': int(batch_size)}
+            with self.db_connection.manager.engine.begin() as conn:
+                rows = conn.execute(query, params).fetchall()
+            return pd.DataFrame(rows, columns=['id', 'file_name'])
+        except Exception as e:
+            print(f"Error claiming pending uploads: {e}")
+            return None
+    
+    def release_claimed_uploads(self, file_ids: List) -> int:
+        """Put claimed uploads that are still marked 'processing' back to 'pending'
+        
+        Called when a claimed batch could not be run, so its rows are picked up
+        again by the next run instead of staying 'processing' for good. Rows the
+        batch already finished (completed/failed) are left alone.
+        """
+        if not file_ids or not self.db_connection:
+            return 0
+        try:
+            from sqlalchemy import text, bindparam
+            query = text("""
+                UPDATE file_upload SET processing_status = 'pending'
+                WHERE id IN :file_ids AND processing_status = 'processing'
+            """).bindparams(bindparam('file_ids', expanding=True))
+            with self.db_connection.manager.engine.begin() as conn:
+                result = conn.execute(query, {'file_ids': list(file_ids)})
+            return result.rowcount
+        except Exception as e:
+            print(f"Error releasing claimed uploads: {e}")
+            return 0
+    
     def get_user_active_jobs(self, uploaded_by: str) -> Optional[pd.DataFrame]:
         """Get currently processing jobs for a specific user"""
         try:
             if not self.db_connection:
                 return None
                 
-            query = f"""
+            query = """
                 SELECT fu.id, fu.file_name, fu.uploaded_by, fu.processing_status,
                        pj.job_status, pj.started_at, pj.updated_at
                 FROM file_upload fu
                 LEFT JOIN processing_jobs pj ON fu.id = pj.file_upload_id
-                WHERE fu.uploaded_by = '{uploaded_by}' 
+                WHERE fu.uploaded_by = :uploaded_by 
                 AND fu.processing_status IN ('processing', 'queued')
                 ORDER BY fu.upload_date ASC
             """
-            return self.db_connection.query_to_dataframe(query)
+            return self.db_connection.query_to_dataframe(query, params={'uploaded_by': uploaded_by})
             
         except Exception as e:
             print(f"Error getting user active jobs: {e}")
@@ -337,15 +456,15 @@ class FileUploadProcessor:
                     return None
             
             # Get the oldest pending upload for this user
-            query = f"""
+            query = """
                 SELECT id, file_name, upload_date, records_count, uploaded_by
                 FROM file_upload 
                 WHERE processing_status = 'pending' 
-                AND uploaded_by = '{uploaded_by}'
+                AND uploaded_by = :uploaded_by
                 ORDER BY upload_date ASC
                 LIMIT 1
             """
-            result = self.db_connection.query_to_dataframe(query)
+            result = self.db_connection.query_to_dataframe(query, params={'uploaded_by': uploaded_by})
             
             if result is not None and not result.empty:
                 return result.iloc[0].to_dict()
@@ -422,12 +541,12 @@ class FileUploadProcessor:
             if not self.db_connection:
                 return None
                 
-            query = f"""
+            query = """
                 SELECT raw_data, original_columns, file_name
                 FROM file_upload 
-                WHERE id = '{file_upload_id}'
+                WHERE id = :file_upload_id
             """
-            result = self.db_connection.query_to_dataframe(query)
+            result = self.db_connection.query_to_dataframe(query, params={'file_upload_id': file_upload_id})
             
             if result is not None and not result.empty:
                 raw_data_str = result.iloc[0]['raw_data']
@@ -449,8 +568,10 @@ class FileUploadProcessor:
         try:
             print(f"🔍 Starting LinkedIn scraping for {len(df)} companies")
             
-            # Initialize the LinkedIn scraper
-            scraper = CompleteCompanyScraper(self.config.config if hasattr(self.config, 'config') else None)
+            # Initialize the LinkedIn scraper (once per processor)
+            if self._linkedin_scraper is None:
+                self._linkedin_scraper = CompleteCompanyScraper(self.config.config if hasattr(self.config, 'config') else None)
+            scraper = self._linkedin_scraper
             
             # Create a copy of the dataframe for scraping
             scraping_df = df.copy()
@@ -581,11 +702,11 @@ class FileUploadProcessor:
 
             # ...existing processing logic...
 
-            # Insert into company_data table first
+            # Insert into company_data table first (bulk COPY; falls back to a regular insert)
             try:
                 mapped_df['file_upload_id'] = file_upload_id
                 mapped_df['created_by'] = 'scheduled_processor'
-                success = self.db_connection.insert_dataframe(mapped_df, "company_data")
+                success = self.db_connection.copy_dataframe(mapped_df, "company_data")
             except Exception as df_error:
                 self.sync_processing_completion(file_upload_id, 'failed', 0, f'Database insertion failed: {df_error}')
                 print(f"❌ Database insertion failed: {df_error}")
@@ -1016,9 +1137,8 @@ def process_all_pending_files():
     success_count = 0
     failure_count = 0
     
-    for _, upload in pending_uploads.iterrows():
-        file_upload_id = upload['id']
-        file_name = upload['file_name']
+    # Only the two columns used are iterated, as plain tuples
+    for file_upload_id, file_name in pending_uploads[['id', 'file_name']].itertuples(index=False, name=None):
         
         print(f"🔄 Processing: {file_name} (ID: {file_upload_id})")
         
@@ -321,6 +321,13 @@ class DatabaseManager:
                     ON file_upload(upload_date)
                 """))
                 
+                # Partial index for the pending-upload queue scan
+                conn.execute(text("""
+                    CREATE INDEX IF NOT EXISTS idx_file_upload_status_date
+                    ON file_upload(processing_status, upload_date)
+                    WHERE processing_status = 'pending'
+                """))
+                
                 conn.execute(text("""
                     CREATE INDEX IF NOT EXISTS idx_file_upload_hash 
                     ON file_upload(file_hash)
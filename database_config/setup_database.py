@@ -14,9 +14,12 @@ def main():
     current_dir = os.path.dirname(os.path.abspath(__file__))
     if current_dir not in sys.path:
         sys.path.insert(0, current_dir)
+    parent_dir = os.path.dirname(current_dir)
+    if parent_dir not in sys.path:
+        sys.path.insert(0, parent_dir)
     
     try:
-        from db_utils import check_database_requirements, get_database_connection, install_requirements
+        from database_config.db_utils import check_database_requirements, get_database_connection, install_requirements
         
         # Check requirements
         print("1️⃣ Checking Requirements...")
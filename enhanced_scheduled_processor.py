@@ -459,9 +459,9 @@ class LinkedInDataProcessor:
                 }
                 insert_data.append(record)
             
-            # Create DataFrame and insert
+            # Create DataFrame and bulk-load it with COPY
             insert_df = pd.DataFrame(insert_data)
-            success = self.db_connection.insert_dataframe(insert_df, "company_data")
+            success = self.db_connection.copy_dataframe(insert_df, "company_data")
             
             if success:
                 logger.info(f"✅ Successfully inserted {len(insert_data)} records into company_data")
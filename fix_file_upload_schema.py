@@ -10,7 +10,7 @@ import sys
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, os.path.join(current_dir, 'database_config'))
 
-from db_utils import get_database_connection
+from database_config.db_utils import get_database_connection
 
 def fix_file_upload_schema():
     """Add missing updated_at column to file_upload table"""
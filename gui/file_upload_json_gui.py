@@ -23,9 +23,11 @@ parent_dir = os.path.dirname(current_dir)
 database_config_path = os.path.join(parent_dir, 'database_config')
 if database_config_path not in sys.path:
     sys.path.insert(0, database_config_path)
+if parent_dir not in sys.path:
+    sys.path.insert(0, parent_dir)
 
 try:
-    from db_utils import get_database_connection, check_database_requirements
+    from database_config.db_utils import get_database_connection, check_database_requirements
     from file_upload_processor import FileUploadProcessor
     DATABASE_AVAILABLE = True
 except ImportError as e:
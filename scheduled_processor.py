@@ -11,6 +11,7 @@ import pandas as pd
 import subprocess
 import tempfile
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 import argparse
@@ -41,6 +42,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Pending files processed concurrently per run (env SCHEDULER_WORKERS). Each file is a
+# full LinkedIn scrape paced to stay under rate detection, so every extra worker
+# multiplies the request rate; keep this at 1-2 (see SCRAPER_WORKERS)
+SCHEDULER_WORKERS = int(os.getenv('SCHEDULER_WORKERS', '1'))
+
 class ScheduledJobProcessor:
     """Scheduled job processor for file uploads"""
     
@@ -93,26 +99,15 @@ class ScheduledJobProcessor:
             
             logger.info(f"📋 Found {len(pending_uploads)} pending uploads")
             
-            success_count = 0
-            failure_count = 0
+            # Only the two columns used are iterated, as plain tuples. In single-job-per-user
+            # mode the queue holds at most one file per user, so per-user order is kept.
+            uploads = list(pending_uploads[['id', 'file_name']].itertuples(index=False, name=None))
+            workers = max(1, min(SCHEDULER_WORKERS, len(uploads)))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scheduled') as executor:
+                results = list(executor.map(self._process_one, uploads))
             
-            for _, upload in pending_uploads.iterrows():
-                file_upload_id = upload['id']
-                file_name = upload['file_name']
-                
-                logger.info(f"🔄 Processing: {file_name} (ID: {file_upload_id})")
-                
-                try:
-                    if self.processor.process_uploaded_file(file_upload_id):
-                        success_count += 1
-                        logger.info(f"✅ Completed: {file_name}")
-                    else:
-                        failure_count += 1
-                        logger.error(f"❌ Failed: {file_name}")
-                        
-                except Exception as e:
-                    failure_count += 1
-                    logger.error(f"❌ Error processing {file_name}: {e}")
+            success_count = sum(results)
+            failure_count = len(results) - success_count
             
             # Log summary
             total = success_count + failure_count
@@ -127,6 +122,20 @@ class ScheduledJobProcessor:
             logger.error(f"❌ Error in scheduled processing: {e}")
             return False
     
+    def _process_one(self, upload) -> bool:
+        """Process one (file_upload_id, file_name) pair, logging instead of raising"""
+        file_upload_id, file_name = upload
+        logger.info(f"🔄 Processing: {file_name} (ID: {file_upload_id})")
+        
+        try:
+            if self.processor.process_uploaded_file(file_upload_id):
+                logger.info(f"✅ Completed: {file_name}")
+                return True
+            logger.error(f"❌ Failed: {file_name}")
+        except Exception as e:
+            logger.error(f"❌ Error processing {file_name}: {e}")
+        return False
+    
     def process_single_file(self, file_upload_id):
         """Process a single file upload by ID"""
         if not self.processor:
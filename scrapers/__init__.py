@@ -0,0 +1 @@
+# This file makes scrapers a Python package.
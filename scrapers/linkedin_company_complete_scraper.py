@@ -645,8 +645,13 @@ class CompleteCompanyScraper:
     # =================== MAIN PROCESSING FUNCTION ===================
     
     def process_companies(self, df: pd.DataFrame, linkedin_column: str = 'LinkedIn_URL', 
-                         website_column: str = 'Company_Website', company_name_column: str = 'Company_Name') -> pd.DataFrame:
-        """Process companies to extract LinkedIn data and website revenue"""
+                         website_column: str = 'Company_Website', company_name_column: str = 'Company_Name',
+                         progress_callback=None) -> pd.DataFrame:
+        """Process companies to extract LinkedIn data and website revenue
+        
+        progress_callback, if given, is called as progress_callback(processed, total)
+        about 50 times over the run and once more when all companies are done.
+        """
         
         # Initialize new columns
         df['Company_Size_Enhanced'] = 'Not Processed'
@@ -658,9 +663,10 @@ class CompleteCompanyScraper:
         
         total_companies = len(df)
         logger.info(f"Starting processing of {total_companies} companies")
+        progress_step = max(1, total_companies // 50)
         
-        for index, row in df.iterrows():
-            logger.info(f"Processing company {index + 1}/{total_companies}: {row.get(company_name_column, 'Unknown')}")
+        for processed, (index, row) in enumerate(df.iterrows(), 1):
+            logger.info(f"Processing company {processed}/{total_companies}: {row.get(company_name_column, 'Unknown')}")
             
             # Extract LinkedIn data (company size and industry)
             linkedin_url = row.get(linkedin_column, '')
@@ -698,9 +704,13 @@ class CompleteCompanyScraper:
                 df.at[index, 'Revenue_Status'] = 'No Website URL'
             
             # Progress update
-            if (index + 1) % 5 == 0:
-                logger.info(f"Processed {index + 1}/{total_companies} companies")
+            if processed % 5 == 0:
+                logger.info(f"Processed {processed}/{total_companies} companies")
+            if progress_callback and processed % progress_step == 0 and processed < total_companies:
+                progress_callback(processed, total_companies)
         
+        if progress_callback:
+            progress_callback(total_companies, total_companies)
         logger.info("Processing completed")
         return df
 
@@ -0,0 +1,41 @@
+"""
+Tests for the controllers' session dependency
+"""
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend_api.controllers import company_data_router, file_data_router
+from backend_api.controllers import session_dependency
+
+
+class _RejectingAuthManager:
+    """Auth manager stand-in that knows no sessions"""
+    
+    def validate_session(self, session_token):
+        return {"valid": False, "message": "Invalid session"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(session_dependency, "get_auth_manager", lambda: _RejectingAuthManager())
+    app = FastAPI()
+    app.include_router(company_data_router)
+    app.include_router(file_data_router)
+    return TestClient(app)
+
+
+def test_delete_file_data_rejects_bogus_session(client):
+    response = client.delete("/api/file-data/1", params={"session_id": "bogus"})
+    
+    assert response.status_code == 401
+
+
+def test_delete_company_record_rejects_bogus_session(client):
+    response = client.delete("/api/company-data/record/1", params={"session_id": "bogus"})
+    
+    assert response.status_code == 401